@@ -0,0 +1,268 @@
+# 计算内核的耗时和峰值内存对比, 运行: python -m physical_model.benchmark
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from physical_model.landau_lifshitz_gilbert import LandauLifshitzGilbertCalculator, CGSSampleInfo, CalculatorType, \
+    KernelType, JACOBIAN_PARAMETERS, sample_columns
+from physical_model.permeability import shimada_mu_parts, eddy_mu_parts, eddy_mu_complex
+from physical_model.result_cache import result_cache
+from physical_model.workspace import PermeabilityWorkspace
+from utils.my_constant import UnitType, constants_for_llg
+
+
+def measure(func, repeat: int = 3):
+    # 返回(最短耗时[s], 峰值内存[MB])
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 1024 ** 2
+
+
+def benchmark_kernel(num_points_list=(10 ** 6, 10 ** 7)):
+    sample_info = CGSSampleInfo(15.0, 1, 1500, 200)
+    for num_points in num_points_list:
+        for kernel_type in KernelType:
+            calculator = LandauLifshitzGilbertCalculator(calculator_type=CalculatorType.SHIMADA,
+                                                         unit_type=UnitType.SI,
+                                                         alpha=0.001, He=0., phi_0=0., delta=0., beta=np.pi / 2,
+                                                         kernel_type=kernel_type, use_cache=False)
+            wall_time, peak = measure(lambda: calculator.calculate(f_info=(1., 1e9), num_points=num_points,
+                                                                   sample_info=sample_info))
+            print(f"kernel={kernel_type.name}\tnum_points={num_points:.0e}\ttime={wall_time:.3f}s\tpeak={peak:.1f}MB")
+
+
+def interpolation_error(freq: np.ndarray, miu_real: np.ndarray, miu_imag: np.ndarray,
+                        freq_ref: np.ndarray, miu_real_ref: np.ndarray, miu_imag_ref: np.ndarray) -> float:
+    # 稀疏网格插值到参考网格上的最大相对误差(μ'在log(f)上线性, μ''在log-log上线性)
+    log_f, log_f_ref = np.log10(freq), np.log10(freq_ref)
+    miu_real_interp = np.interp(log_f_ref, log_f, miu_real)
+    miu_imag_interp = np.exp(np.interp(log_f_ref, log_f, np.log(miu_imag)))
+    return max(np.max(np.abs(miu_real_interp - miu_real_ref) / np.hypot(miu_real_ref, miu_imag_ref)),
+               np.max(np.abs(miu_imag_interp - miu_imag_ref) / miu_imag_ref))
+
+
+def benchmark_adaptive(tol: float = 1e-3):
+    calculator = LandauLifshitzGilbertCalculator(calculator_type=CalculatorType.SHIMADA, unit_type=UnitType.SI,
+                                                 alpha=0.001, He=0., phi_0=0., delta=0., beta=np.pi / 2,
+                                                 use_cache=False)
+    f_info = (1., 1e9)
+    for sample_info in [CGSSampleInfo(15.0, 1, 0, 20000), CGSSampleInfo(15.0, 1, 1500, 200)]:
+        freq_ref, (miu_real_ref, miu_imag_ref) = calculator.calculate(f_info=f_info, num_points=10 ** 6,
+                                                                      sample_info=sample_info)
+        freq, (miu_real, miu_imag) = calculator.calculate_adaptive(f_info=f_info, sample_info=sample_info, tol=tol)
+        error = interpolation_error(freq, miu_real, miu_imag, freq_ref, miu_real_ref, miu_imag_ref)
+        print(f"adaptive\tnum_points={freq.shape[0]}\terror={error:.2e}")
+        for num_points in (10 ** 3, 10 ** 4, 10 ** 5):
+            freq, (miu_real, miu_imag) = calculator.calculate(f_info=f_info, num_points=num_points,
+                                                              sample_info=sample_info)
+            error = interpolation_error(freq, miu_real, miu_imag, freq_ref, miu_real_ref, miu_imag_ref)
+            print(f"uniform\tnum_points={num_points}\terror={error:.2e}")
+
+
+def benchmark_workspace(num_points: int = 10 ** 6, repeat: int = 20):
+    # 重复计算同一长度的频谱: calculate每次分配中间数组, calculate_into复用工作区和输出数组
+    sample_info = CGSSampleInfo(15.0, 1, 1500, 200)
+    calculator = LandauLifshitzGilbertCalculator(calculator_type=CalculatorType.SHIMADA, unit_type=UnitType.SI,
+                                                 alpha=0.001, He=0., phi_0=0., delta=0., beta=np.pi / 2,
+                                                 kernel_type=KernelType.COMPLEX, use_cache=False)
+    workspace = PermeabilityWorkspace(num_points)
+    out = np.empty(num_points, dtype=np.complex128)
+    cases = {"calculate": lambda: calculator.calculate(f_info=(1., 1e9), num_points=num_points,
+                                                       sample_info=sample_info),
+             "calculate_into": lambda: calculator.calculate_into(f_info=(1., 1e9), num_points=num_points,
+                                                                 sample_info=sample_info, workspace=workspace,
+                                                                 out=out)}
+    for name, func in cases.items():
+        # 预热后统计稳态下的耗时和分配
+        func()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        wall_time = (time.perf_counter() - start) / repeat
+        tracemalloc.start()
+        for _ in range(repeat):
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name}\tnum_points={num_points:.0e}\ttime={wall_time:.4f}s/call\tpeak allocation={peak / 1024 ** 2:.3f}MB")
+
+
+def benchmark_threaded(num_points_list=(10 ** 5, 10 ** 6, 10 ** 7)):
+    # 单线程与按频率分块的多线程计算, 小网格时threaded自动退回单线程
+    sample_info = CGSSampleInfo(15.0, 1, 1500, 200)
+    calculator = LandauLifshitzGilbertCalculator(calculator_type=CalculatorType.SHIMADA, unit_type=UnitType.SI,
+                                                 alpha=0.001, He=0., phi_0=0., delta=0., beta=np.pi / 2,
+                                                 use_cache=False)
+    for num_points in num_points_list:
+        for threaded in (False, True):
+            wall_time, _ = measure(lambda: calculator.calculate(f_info=(1., 1e9), num_points=num_points,
+                                                                sample_info=sample_info, threaded=threaded))
+            print(f"threaded={threaded}\tthreads={calculator._thread_count(num_points) if threaded else 1}"
+                  f"\tnum_points={num_points:.0e}\ttime={wall_time:.3f}s")
+
+
+def benchmark_jacobian(num_samples: int = 100, num_points: int = 10 ** 4, step: float = 1e-6):
+    # 解析雅可比矩阵与前向差分(1+5次完整计算)的耗时和差异
+    rng = np.random.default_rng(0)
+    parameters = np.stack([rng.uniform(0.001, 0.05, num_samples), rng.uniform(0.5, 2.0, num_samples),
+                           rng.uniform(10., 1000., num_samples), rng.uniform(1e-7, 1e-5, num_samples),
+                           rng.uniform(1e-7, 1e-5, num_samples)])
+    calculator = LandauLifshitzGilbertCalculator(calculator_type=CalculatorType.SHIMADA, unit_type=UnitType.SI,
+                                                 alpha=0.001, He=0., phi_0=0., delta=0., beta=np.pi / 2,
+                                                 kernel_type=KernelType.COMPLEX, use_cache=False)
+
+    def evaluate(alpha, Ms, Hk, rho, t):
+        return calculator.calculate_batch(f_info=(1., 1e10), num_points=num_points, Ms=Ms, Hk=Hk, rho=rho, t=t,
+                                          alpha=alpha)[1]
+
+    def finite_difference():
+        miu = evaluate(*parameters)
+        jac = np.empty((num_samples, len(JACOBIAN_PARAMETERS), num_points), dtype=np.complex128)
+        for i in range(len(JACOBIAN_PARAMETERS)):
+            shifted = parameters.copy()
+            shifted[i] *= 1. + step
+            jac[:, i] = (evaluate(*shifted) - miu) / (step * parameters[i])[:, None]
+        return miu, jac
+
+    def analytic():
+        alpha, Ms, Hk, rho, t = parameters
+        return calculator.calculate_jacobian(f_info=(1., 1e10), num_points=num_points, Ms=Ms, Hk=Hk, rho=rho, t=t,
+                                             alpha=alpha)[1:]
+
+    for name, func in (("finite difference", finite_difference), ("analytic", analytic)):
+        wall_time, peak = measure(func)
+        print(f"{name}\tsamples={num_samples}\tnum_points={num_points:.0e}\ttime={wall_time:.3f}s\tpeak={peak:.1f}MB")
+    _, jac_fd = finite_difference()
+    _, jac = analytic()
+    error = np.max(np.abs(jac_fd - jac) / np.max(np.abs(jac), axis=-1, keepdims=True), axis=(0, 2))
+    print("max relative difference:", dict(zip(JACOBIAN_PARAMETERS, error)))
+
+
+def benchmark_unit_parity(num_samples: int = 100, num_points: int = 10 ** 4, tol: float = 1e-9):
+    # 同一组样品分别用SI和CGS(emu)单位制计算, 比较μ的最大相对差和耗时, 相对差超过tol时失败
+    # scipy的μ_0不严格等于4π*1e-7, 两种单位制的结果有~1e-10的相对差
+    rng = np.random.default_rng(0)
+    # CGSSampleInfo的输入: Ms[kGs], Hk[Oe], ρ[μΩ*cm], t[nm], 一半样品无涡流(ρ=0)
+    rho = rng.uniform(10., 1000., num_samples)
+    rho[::2] = 0.
+    samples = (rng.uniform(5., 20., num_samples), rng.uniform(1., 100., num_samples), rho,
+               rng.uniform(100., 10000., num_samples))
+    He_oe = 1.
+    for calculator_type, kernel_type in ((CalculatorType.SHIMADA, KernelType.REAL),
+                                         (CalculatorType.SHIMADA, KernelType.COMPLEX),
+                                         (CalculatorType.WANG, KernelType.REAL)):
+        results = {}
+        for unit_type, He in ((UnitType.SI, He_oe * 1000. / (4. * np.pi)), (UnitType.CGS, He_oe)):
+            calculator = LandauLifshitzGilbertCalculator(calculator_type=calculator_type, unit_type=unit_type,
+                                                         alpha=0.01, He=He, phi_0=0., delta=0., beta=np.pi / 2,
+                                                         kernel_type=kernel_type, use_cache=False)
+            Ms, Hk, rho, t = sample_columns(*samples, unit_type=unit_type)
+
+            def run():
+                return calculator.calculate_batch(f_info=(1., 1e10), num_points=num_points, Ms=Ms, Hk=Hk, rho=rho,
+                                                  t=t)[1]
+
+            wall_time, _ = measure(run)
+            results[unit_type] = run()
+            print(f"{calculator_type.name}/{kernel_type.name}\t{unit_type.name}\tsamples={num_samples}\t"
+                  f"num_points={num_points:.0e}\ttime={wall_time:.3f}s")
+        error = np.max(np.abs(results[UnitType.CGS] - results[UnitType.SI]) / np.abs(results[UnitType.SI]))
+        print(f"{calculator_type.name}/{kernel_type.name}\tmax relative difference={error:.2e}")
+        assert error < tol, f"{calculator_type.name}/{kernel_type.name}: SI and CGS differ by {error:.2e}"
+
+
+def benchmark_unit_conversion(num_samples: int = 10 ** 5):
+    # 逐个创建CGSSampleInfo(不打印)与按列一次换算的耗时
+    rng = np.random.default_rng(0)
+    columns = (rng.uniform(5., 20., num_samples), rng.uniform(1., 100., num_samples),
+               rng.uniform(0., 1000., num_samples), rng.uniform(100., 10000., num_samples))
+
+    def per_sample():
+        infos = [CGSSampleInfo(*row, verbose=False).get_info() for row in zip(*(x.tolist() for x in columns))]
+        return tuple(np.array(x) for x in zip(*infos))
+
+    def vectorized():
+        return sample_columns(*columns)
+
+    for name, func in (("CGSSampleInfo", per_sample), ("sample_columns", vectorized)):
+        wall_time, peak = measure(func)
+        print(f"{name}\tsamples={num_samples:.0e}\ttime={wall_time:.4f}s\tpeak={peak:.1f}MB")
+    error = max(np.max(np.abs(a - b) / np.abs(b), initial=0.) for a, b in zip(per_sample(), vectorized()))
+    print(f"max relative difference={error:.2e}")
+
+
+def check_eddy_closed_form(num_samples: int = 100, num_points: int = 10 ** 4, tol: float = 1e-12):
+    # 实数内核的涡流闭式解必须与μ*tanh(x)/x相同, x = t/2*√(-iμ_0'*μ*ω/ρ), 两种单位制都检查
+    rng = np.random.default_rng(0)
+    samples = (rng.uniform(5., 20., num_samples), rng.uniform(1., 100., num_samples),
+               rng.uniform(10., 1000., num_samples), rng.uniform(100., 10000., num_samples))
+    omega = 2. * np.pi * np.logspace(0., 10., num_points)
+    for unit_type in UnitType:
+        constants = constants_for_llg.resolve(unit_type)
+        Ms, Hk, rho, t = (x[:, None] for x in sample_columns(*samples, unit_type=unit_type))
+        miu_real, miu_imag = shimada_mu_parts(omega, Ms, Hk, 0.01, constants)
+        rst_real, rst_imag = eddy_mu_parts(omega, miu_real, miu_imag, rho, t, constants)
+        expected = eddy_mu_complex(omega, miu_real + 1j * miu_imag, rho, t, constants)
+        error = np.max(np.abs(rst_real + 1j * rst_imag - expected) / np.abs(expected))
+        print(f"{unit_type.name}\teddy closed form vs μ*tanh(x)/x: max relative difference={error:.2e}")
+        assert error < tol, f"{unit_type.name}: eddy closed form differs from μ*tanh(x)/x by {error:.2e}"
+
+
+def check_concurrent_cache(threads: int = 8, num_samples: int = 20, calls: int = 20000, num_points: int = 8):
+    # 多个线程共用一个启用缓存的计算器, 缓存很小, 频繁淘汰; 结果必须与不用缓存的串行计算完全相同
+    rng = np.random.default_rng(0)
+    samples = [CGSSampleInfo(Ms, Hk, rho, t, verbose=False) for Ms, Hk, rho, t in
+               zip(rng.uniform(5., 20., num_samples), rng.uniform(1., 100., num_samples),
+                   rng.uniform(0., 1000., num_samples), rng.uniform(100., 10000., num_samples))]
+    calculator = LandauLifshitzGilbertCalculator(calculator_type=CalculatorType.SHIMADA, unit_type=UnitType.SI,
+                                                 alpha=0.01, He=0., phi_0=0., delta=0., beta=np.pi / 2,
+                                                 kernel_type=KernelType.COMPLEX, use_cache=False)
+    expected = [calculator.calculate((1., 1e10), num_points, sample)[1] for sample in samples]
+    calculator.use_cache = True
+    max_bytes = result_cache.max_bytes
+    # 最多缓存3条结果
+    result_cache.clear()
+    result_cache.max_bytes = 3 * num_points * np.dtype(np.complex128).itemsize
+
+    def run(index: int) -> bool:
+        miu_real, miu_imag = calculator.calculate((1., 1e10), num_points, samples[index])[1]
+        return np.array_equal(miu_real, expected[index][0]) and np.array_equal(miu_imag, expected[index][1])
+
+    # 缩短线程切换间隔, 让线程尽量在缓存操作的中途切换
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            matches = list(executor.map(run, rng.integers(num_samples, size=calls)))
+        wall_time = time.perf_counter() - start
+        tracked, actual = result_cache.nbytes, sum(value.nbytes for value in result_cache._entries.values())
+        info = result_cache.info()
+    finally:
+        sys.setswitchinterval(switch_interval)
+        result_cache.max_bytes = max_bytes
+        result_cache.clear()
+    print(f"threads={threads}\tcalls={calls}\ttime={wall_time:.3f}s\t{info}")
+    assert all(matches), f"{matches.count(False)} of {calls} threaded results differ from serial"
+    assert tracked == actual, f"cache tracks {tracked} bytes, holds {actual} bytes"
+
+
+if __name__ == '__main__':
+    benchmark_kernel()
+    benchmark_adaptive()
+    benchmark_workspace()
+    benchmark_threaded()
+    benchmark_jacobian()
+    benchmark_unit_parity()
+    benchmark_unit_conversion()
+    check_eddy_closed_form()
+    check_concurrent_cache()
@@ -1,106 +1,381 @@
 # 这个文件是根据 山田 的 《磁性材料》编写的
 from typing import Union, List, Tuple
 from enum import Enum
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+import os
 import numpy as np
 import sympy as sy
 # np.set_printoptions(precision=32)
 from utils.science_plot import SciencePlot, SciencePlotData
-from utils.my_constant import constants_for_llg,UnitType
+from utils.my_constant import constants_for_llg, sample_units, UnitType
+from physical_model.result_cache import ResultCache, result_cache
+from physical_model.permeability import shimada_mu_parts, eddy_mu_parts, shimada_mu, wang_eddy_mu, \
+    shimada_mu_into, shimada_eddy_mu_into, shimada_mu_jacobian, eddy_mu_jacobian
+from physical_model.workspace import PermeabilityWorkspace
+
+
+# 输入单位到各单位制的换算系数快照, 导入时解析一次
+SAMPLE_FACTORS = {unit_type: sample_units.resolve(unit_type) for unit_type in UnitType}
+
+
+def sample_columns(Ms, Hk, rho, t, unit_type: UnitType = UnitType.SI) -> Tuple[np.ndarray, ...]:
+    # 把输入单位(kG, Oe, μΩ*cm, nm)的整列样品参数一次换算到unit_type单位制, 返回float64数组
+    # 结果可以直接传给calculate_batch, 不需要为每个样品创建CGSSampleInfo
+    factors = SAMPLE_FACTORS[unit_type]
+    return tuple(np.multiply(np.asarray(x, dtype=np.float64), factor)
+                 for x, factor in zip((Ms, Hk, rho, t), factors))
 
 
 class CGSSampleInfo:
-    def __init__(self, Ms: float, Hk: float, rho: float, t: float):
-        self.Ms: float = Ms / 10.  # kG->T
-        self.Hk: float = Hk * 1000./(4*constants_for_llg.pi)  # Oe->A/m
-        self.rho: float = rho * 1e-8  # μΩ*cm->Ω*m
-        self.t: float = t * 1e-9  # nm->m
-        print(f"New CGS Sample Info:"
-              f"\nMs\t={Ms}[kG]\t={self.Ms}[T],"
-              f"\nHk\t={Hk}[Oe]\t={self.Hk}[A/m],"
-              f"\nρ\t={rho}[μΩ*cm]\t={self.rho}[Ω*m],"
-              f"\nt\t={t}[nm]\t={self.t}[m].")
-
-    def get_info(self):
-        return self.Ms, self.Hk, self.rho, self.t
+    def __init__(self, Ms: float, Hk: float, rho: float, t: float, verbose: bool = True):
+        si = SAMPLE_FACTORS[UnitType.SI]
+        self.Ms: float = Ms * si.Ms  # kG->T
+        self.Hk: float = Hk * si.Hk  # Oe->A/m
+        self.rho: float = rho * si.rho  # μΩ*cm->Ω*m
+        self.t: float = t * si.t  # nm->m
+        # 电磁单位制(emu)的值, 供UnitType.CGS的计算器直接使用
+        cgs = SAMPLE_FACTORS[UnitType.CGS]
+        self.cgs_info = (Ms * cgs.Ms,  # kG->G (4πM_S)
+                         Hk * cgs.Hk,  # Oe
+                         rho * cgs.rho,  # μΩ*cm->abΩ*cm
+                         t * cgs.t)  # nm->cm
+        if verbose:
+            print(f"New CGS Sample Info:"
+                  f"\nMs\t={Ms}[kG]\t={self.Ms}[T],"
+                  f"\nHk\t={Hk}[Oe]\t={self.Hk}[A/m],"
+                  f"\nρ\t={rho}[μΩ*cm]\t={self.rho}[Ω*m],"
+                  f"\nt\t={t}[nm]\t={self.t}[m].")
+
+    def get_info(self, unit_type: UnitType = UnitType.SI):
+        # 返回指定单位制下的(Ms, Hk, rho, t), 换算只在构造时进行一次
+        if unit_type == UnitType.SI:
+            return self.Ms, self.Hk, self.rho, self.t
+        elif unit_type == UnitType.CGS:
+            return self.cgs_info
+        else:
+            raise ValueError("Unsupported unit type")
 
 class CalculatorType(Enum):
     WANG = 1
     SHIMADA = 2
 
+class KernelType(Enum):
+    REAL = 1  # 实部和虚部分别计算
+    COMPLEX = 2  # 直接在complex128上计算
+
+class FrequencySpacing(Enum):
+    LOG = 1
+    LINEAR = 2
+
+
+# calculate_jacobian 返回的偏导数顺序
+JACOBIAN_PARAMETERS = ('alpha', 'Ms', 'Hk', 'rho', 't')
+
+# 多线程模式下每个线程至少处理的频率点数, 点数更少时线程调度的开销大于收益
+THREAD_MIN_POINTS = 2 ** 17
+# 每个频率块的最大点数, 块内的临时数组尽量留在缓存中
+THREAD_CHUNK_POINTS = 2 ** 15
+
+
+# 频率网格缓存的点数上限, 每个网格(freq+omega)最多16MB, 缓存最多占用256MB
+FREQUENCY_GRID_CACHE_POINTS = 2 ** 20
+# 结果缓存的点数上限, 每个样品的结果(complex128)最多16MB, 更大的结果不放入缓存
+RESULT_CACHE_MAX_POINTS = 2 ** 20
+
+
+def frequency_grid(min_f: float, max_f: float, num_points: int,
+                   spacing: FrequencySpacing = FrequencySpacing.LOG) -> Tuple[np.ndarray, np.ndarray]:
+    # 所有计算器共享的只读频率网格(freq, omega), 相同参数只生成一次
+    # 点数超过上限的网格不缓存, 避免大网格在进程结束前一直占用内存
+    if num_points > FREQUENCY_GRID_CACHE_POINTS:
+        return _frequency_grid(min_f, max_f, num_points, spacing)
+    return _cached_frequency_grid(min_f, max_f, num_points, spacing)
+
+
+def _frequency_grid(min_f: float, max_f: float, num_points: int,
+                    spacing: FrequencySpacing) -> Tuple[np.ndarray, np.ndarray]:
+    if spacing == FrequencySpacing.LOG:
+        freq = np.logspace(np.log10(min_f), np.log10(max_f), num=num_points)
+    elif spacing == FrequencySpacing.LINEAR:
+        freq = np.linspace(min_f, max_f, num=num_points)
+    else:
+        raise TypeError(f"Unknown frequency spacing: {spacing}")
+    omega = 2 * np.pi * freq
+    freq.flags.writeable = False
+    omega.flags.writeable = False
+    return freq, omega
+
+
+_cached_frequency_grid = lru_cache(maxsize=16)(_frequency_grid)
+
+
 class LandauLifshitzGilbertCalculator:
+    # 计算只依赖参数和self.constants, 计算过程中不修改对象状态, 同一个计算器可以在多个线程中共用
 
     def __init__(self, calculator_type: CalculatorType, unit_type: UnitType, alpha: float,
-                 He: float, phi_0: float, delta: float, beta: float):
+                 He: float, phi_0: float, delta: float, beta: float, kernel_type: KernelType = KernelType.REAL,
+                 use_cache: bool = True):
         self.calculator_type = calculator_type
+        self.kernel_type = kernel_type
+        self.use_cache = use_cache  # 是否使用共享的结果缓存
         self.unit_type = unit_type
-        constants_for_llg.use(unit_type)
+        # 本计算器使用的常数值, 不同单位制的计算器互不影响
+        self.constants = constants_for_llg.resolve(unit_type)
         constants_for_llg.info()
         self.alpha = alpha  # 衰减常数
-        self.Ms = None  # 饱和磁化
-        self.Hk = None  # 膝点
         self.He = He  # 外部直流磁场
-        self.phi_0 = phi_0  # M在xy平面的投影和e.a.的夹角
+        self.phi_0 = phi_0  # M在xy平面的投影和e.a.的夹角, None时由He和delta求平衡角
         self.delta = delta  # He和e.a.的夹角
         self.beta = beta  # 高频磁场h和e.a.的夹角
-
-        self.freq = None
-        self.omega = None
-        self.rho = None  # 电导率
-        self.t = None  # 膜厚
         print(f"alpha: {self.alpha},He: {self.He},phi_0: {self.phi_0},delta: {self.delta},beta: {self.beta}")
 
-    def calculate(self, f_info: Tuple[float, float], num_points: int, sample_info: CGSSampleInfo):
+    def calculate(self, f_info: Tuple[float, float], num_points: int, sample_info: CGSSampleInfo,
+                  spacing: FrequencySpacing = FrequencySpacing.LOG, threaded: bool = False):
+        # threaded=True时按频率分块在线程池中计算, 线程数和块大小由num_points和CPU核数决定
+        min_f, max_f = f_info
+        freq, omega = frequency_grid(float(min_f), float(max_f), int(num_points), spacing)
+        self._check_calculator_type()
+        Ms, Hk, rho, t = sample_info.get_info(self.unit_type)
+        use_cache = self._use_cache(num_points)
+        if use_cache:
+            # 命中时返回缓存结果实部/虚部的副本, 与未命中时一样是可写的新数组
+            key = self._cache_key(f_info, num_points, spacing, self.alpha, Ms, Hk, rho, t)
+            miu = result_cache.get(key)
+            if miu is not None:
+                return freq, (miu.real.copy(), miu.imag.copy())
+        if threaded and omega.shape[0] >= THREAD_MIN_POINTS:
+            miu_real, miu_imag = self._calculate_threaded(omega, Ms, Hk, rho, t, self._thread_count(omega.shape[0]))
+        else:
+            miu_real, miu_imag = self._calculate_kernel(omega, Ms, Hk, rho, t)
+        if use_cache:
+            result_cache.put(key, miu_real + 1j * miu_imag)
+        return freq, (miu_real, miu_imag)
+
+    def calculate_batch(self, f_info: Tuple[float, float], num_points: int, Ms: np.ndarray, Hk: np.ndarray,
+                        rho: np.ndarray, t: np.ndarray, alpha: np.ndarray = None,
+                        spacing: FrequencySpacing = FrequencySpacing.LOG):
+        # 一次性计算N个样品, Ms/Hk/rho/t为计算器单位制(unit_type)下的一维数组, 返回(N, num_points)的复数磁导率
+        # WANG的He和角度为数组时返回(N, *broadcast(He, phi_0, delta, beta).shape, num_points)
+        # alpha为None时所有样品使用self.alpha, 否则为每个样品单独指定的衰减常数
         min_f, max_f = f_info
-        self.freq = np.logspace(np.log10(min_f), np.log10(max_f), num=num_points)
-        self.omega = 2 * np.pi * self.freq
-        # print(self.freq,self.omega)
-        if self.calculator_type == CalculatorType.SHIMADA:
-            self.Ms, self.Hk, self.rho, self.t = sample_info.get_info()
-            if self.rho == 0.:
-                return self.freq, self._miu_shimada()
+        freq, omega = frequency_grid(float(min_f), float(max_f), int(num_points), spacing)
+        self._check_calculator_type()
+        # (N,1)列向量与(num_points,)的omega广播
+        Ms, Hk, rho, t = (np.asarray(x, dtype=np.float64).reshape(-1, 1) for x in (Ms, Hk, rho, t))
+        if alpha is not None:
+            alpha = np.broadcast_to(np.asarray(alpha, dtype=np.float64).reshape(-1, 1), Ms.shape)
+        if not self._use_cache(num_points):
+            return freq, self._calculate_columns(omega, Ms, Hk, rho, t, alpha)
+        alpha_list = alpha[:, 0] if alpha is not None else [self.alpha] * Ms.shape[0]
+        keys = [self._cache_key(f_info, num_points, spacing, *parameters)
+                for parameters in zip(alpha_list, Ms[:, 0], Hk[:, 0], rho[:, 0], t[:, 0])]
+        miu = np.empty((Ms.shape[0], omega.shape[0]), dtype=np.complex128)
+        missing = []
+        for row, key in enumerate(keys):
+            cached = result_cache.get(key)
+            if cached is None:
+                missing.append(row)
             else:
-                return self.freq, self._miu_shimada_eddy()
-        elif self.calculator_type == CalculatorType.WANG:
-            pass
+                miu[row] = cached
+        if missing:
+            # 只计算缓存中没有的样品
+            missing = np.array(missing)
+            miu[missing] = self._calculate_columns(omega, Ms[missing], Hk[missing], rho[missing], t[missing],
+                                                   alpha[missing] if alpha is not None else None)
+            for row in missing:
+                result_cache.put(keys[row], miu[row].copy())
+        return freq, miu
+
+    def calculate_jacobian(self, f_info: Tuple[float, float], num_points: int, Ms: np.ndarray, Hk: np.ndarray,
+                           rho: np.ndarray, t: np.ndarray, alpha: np.ndarray = None,
+                           spacing: FrequencySpacing = FrequencySpacing.LOG):
+        # 同时返回μ(N, num_points)和解析雅可比矩阵jac(N, 5, num_points), 参数顺序见JACOBIAN_PARAMETERS
+        # μ = μ'+iμ'', 参数都是实数, 所以 ∂μ'/∂p = Re(jac), ∂μ''/∂p = Im(jac)
+        if self.calculator_type != CalculatorType.SHIMADA:
+            raise TypeError(f"Jacobian only supports {CalculatorType.SHIMADA}, got {self.calculator_type}")
+        min_f, max_f = f_info
+        freq, omega = frequency_grid(float(min_f), float(max_f), int(num_points), spacing)
+        Ms, Hk, rho, t = (np.asarray(x, dtype=np.float64).reshape(-1, 1) for x in (Ms, Hk, rho, t))
+        if alpha is None:
+            alpha = self.alpha
+        else:
+            alpha = np.broadcast_to(np.asarray(alpha, dtype=np.float64).reshape(-1, 1), Ms.shape)
+        miu, jac = shimada_mu_jacobian(omega, Ms, Hk, alpha, len(JACOBIAN_PARAMETERS), self.constants)
+        eddy = rho[:, 0] != 0.
+        if np.any(eddy):
+            # rho=0的样品没有涡流项, ∂μ/∂ρ和∂μ/∂t保持为0
+            miu[eddy], jac[eddy] = eddy_mu_jacobian(omega, miu[eddy], jac[eddy], rho[eddy], t[eddy], self.constants)
+        return freq, miu, jac
+
+    def calculate_adaptive(self, f_info: Tuple[float, float], sample_info: CGSSampleInfo, tol: float = 1e-3,
+                           initial_points: int = 65, max_points: int = 20000):
+        # 非均匀频率采样: 在log(f)上反复二分插值误差超过tol的区间, 点集中在共振和涡流截止附近
+        # 插值误差: μ'按log(f)线性插值, μ''按log(f)-log(μ'')线性插值, 均为相对误差
+        self._check_calculator_type()
+        if not self._angles_are_scalar():
+            raise ValueError("Adaptive sampling needs scalar He, phi_0, delta and beta")
+        min_f, max_f = f_info
+        columns = [np.full((1, 1), x, dtype=np.float64) for x in sample_info.get_info(self.unit_type)]
+
+        def evaluate(log_f: np.ndarray) -> np.ndarray:
+            return self._calculate_columns(2 * np.pi * np.power(10., log_f), *columns)[0]
+
+        log_f = np.linspace(np.log10(min_f), np.log10(max_f), num=initial_points)
+        miu = evaluate(log_f)
+        # done[i]表示区间[log_f[i], log_f[i+1]]已满足精度
+        done = np.zeros(log_f.shape[0] - 1, dtype=bool)
+        while not np.all(done) and log_f.shape[0] < max_points:
+            todo = np.flatnonzero(~done)
+            log_f_mid = 0.5 * (log_f[todo] + log_f[todo + 1])
+            miu_mid = evaluate(log_f_mid)
+            miu_lo, miu_hi = miu[todo], miu[todo + 1]
+            error_real = np.abs(miu_mid.real - 0.5 * (miu_lo.real + miu_hi.real)) / np.abs(miu_mid)
+            imag_positive = (miu_lo.imag > 0.) & (miu_hi.imag > 0.) & (miu_mid.imag > 0.)
+            error_imag = np.where(imag_positive,
+                                  np.abs(np.log(np.where(imag_positive, miu_mid.imag, 1.))
+                                         - 0.5 * np.log(np.where(imag_positive, miu_lo.imag * miu_hi.imag, 1.))),
+                                  np.abs(miu_mid.imag - 0.5 * (miu_lo.imag + miu_hi.imag)) / np.abs(miu_mid))
+            error = np.maximum(error_real, error_imag)
+            split = error > tol
+            done[todo[~split]] = True
+            # 点数预算不足时只二分误差最大的区间
+            budget = max_points - log_f.shape[0]
+            if np.count_nonzero(split) > budget:
+                split[np.argsort(error)[:-budget] if budget > 0 else slice(None)] = False
+            if not np.any(split):
+                break
+            split_index = todo[split]
+            # 在split_index+1处插入中点, 新的两个子区间都未完成
+            log_f = np.insert(log_f, split_index + 1, log_f_mid[split])
+            miu = np.insert(miu, split_index + 1, miu_mid[split])
+            done = np.insert(done, split_index + 1, False)
+        freq = np.power(10., log_f)
+        return freq, (miu.real, miu.imag)
+
+    def iter_calculate(self, f_info: Tuple[float, float], num_points: int, sample_info: CGSSampleInfo,
+                       chunk_size: int = 2 ** 16, spacing: FrequencySpacing = FrequencySpacing.LOG):
+        # 分块生成(freq_chunk, miu_real_chunk, miu_imag_chunk), 内存只与chunk_size有关
+        # 拼接(沿最后一轴)后与calculate(f_info, num_points, sample_info, spacing)的结果相同
+        # WANG的He和角度为数组时, 每块的形状为broadcast(He, phi_0, delta, beta).shape + (块长,)
+        self._check_calculator_type()
+        if spacing not in (FrequencySpacing.LOG, FrequencySpacing.LINEAR):
+            raise TypeError(f"Unknown frequency spacing: {spacing}")
+        min_f, max_f = f_info
+        if spacing == FrequencySpacing.LOG:
+            start_value, stop_value = np.log10(min_f), np.log10(max_f)
         else:
+            start_value, stop_value = float(min_f), float(max_f)
+        step = (stop_value - start_value) / (num_points - 1) if num_points > 1 else 0.
+        columns = [np.full((1, 1), x, dtype=np.float64) for x in sample_info.get_info(self.unit_type)]
+        for start in range(0, num_points, chunk_size):
+            stop = min(start + chunk_size, num_points)
+            # 与np.logspace/np.linspace相同的取点方式, 最后一点取端点
+            values = np.arange(start, stop) * step + start_value
+            if stop == num_points and num_points > 1:
+                values[-1] = stop_value
+            freq_chunk = np.power(10., values) if spacing == FrequencySpacing.LOG else values
+            miu = self._calculate_columns(2 * np.pi * freq_chunk, *columns)[0]
+            yield freq_chunk, miu.real, miu.imag
+
+    def calculate_into(self, f_info: Tuple[float, float], num_points: int, sample_info: CGSSampleInfo,
+                       workspace: PermeabilityWorkspace, out: np.ndarray = None,
+                       spacing: FrequencySpacing = FrequencySpacing.LOG):
+        # 中间量写入workspace, 结果写入out(complex128, 长度num_points), 稳态下不分配大数组
+        if self.calculator_type != CalculatorType.SHIMADA:
+            raise TypeError(f"Workspace kernels only support {CalculatorType.SHIMADA}, got {self.calculator_type}")
+        workspace.check(num_points)
+        if out is None:
+            out = np.empty(num_points, dtype=np.complex128)
+        elif out.shape != (num_points,) or out.dtype != np.complex128:
+            raise ValueError(f"out must be a complex128 array of shape ({num_points},)")
+        min_f, max_f = f_info
+        freq, omega = frequency_grid(float(min_f), float(max_f), int(num_points), spacing)
+        Ms, Hk, rho, t = sample_info.get_info(self.unit_type)
+        if rho == 0.:
+            shimada_mu_into(omega, Ms, Hk, self.alpha, self.constants, workspace, out)
+        else:
+            shimada_eddy_mu_into(omega, Ms, Hk, self.alpha, rho, t, self.constants, workspace, out)
+        return freq, (out.real, out.imag)
+
+    def _check_calculator_type(self):
+        if self.calculator_type not in (CalculatorType.SHIMADA, CalculatorType.WANG):
             raise TypeError(f"Unknown calculator type: {self.calculator_type}")
-    def _miu_shimada(self):
-        # M_S/(μ_0*H_k)
-        term_1 = self.Ms/(constants_for_llg.miu_0*self.Hk)
-        # ω_r^2 = γ^2*H_k*(H_k+M_S/μ_0)
-        omega_r_square = constants_for_llg.gamma**2*self.Hk*(self.Hk+self.Ms/constants_for_llg.miu_0)
-        # λ' = (M_S*α*γ)/μ_0
-        lambda_prime = self.Ms*self.alpha*constants_for_llg.gamma/constants_for_llg.miu_0
-        # ω_r^2-ω^2
-        term_2_top_1 = omega_r_square - np.square(self.omega)
-        # λ'*ω
-        term_2_top_2 = lambda_prime*self.omega
-        term_2_bot = np.square(term_2_top_1) + np.square(term_2_top_2)
-        rst_real = term_1*omega_r_square*term_2_top_1/term_2_bot+1
-        rst_imag = term_1*omega_r_square*term_2_top_2/term_2_bot
-        return rst_real,rst_imag
-
-    def _miu_shimada_eddy(self):
-        miu_r_real, miu_r_imag = self._miu_shimada()
-        # k = t√(ωρ)
-        k = self.t*np.sqrt(self.omega/self.rho)
-        # μ_r = μ_√(μ_r1^2+μ_r2^2)
-        miu_r = np.sqrt(np.square(miu_r_real)+np.square(miu_r_imag))
-        # A = √(μ_0/2*(μ_r2+μ_r))
-        A = np.sqrt(0.5*constants_for_llg.miu_0*(miu_r_imag+miu_r))
-        # B = √(μ_0/2*(-μ_r2+μ_r))
-        B = np.sqrt(0.5*constants_for_llg.miu_0*(-miu_r_imag+miu_r))
-        # S = k/2*μ_0*μ_r*[cosh(kA)+cos(kB)]
-        S = 0.5*k*constants_for_llg.miu_0*miu_r*(np.cosh(k*A)+np.cos(k*B))
-        # A*sinh(kA)+B*sinh(kB)
-        term_top_1 = A * np.sinh(k * A) + B * np.sinh(k * B)
-        # A*sinh(kA)-B*sinh(kB)
-        term_top_2 = B * np.sinh(k * A) - A * np.sinh(k * B)
-        #
-        rst_real = (miu_r_real*term_top_1 - miu_r_imag*term_top_2)/S
-        rst_imag = (miu_r_imag*term_top_1 + miu_r_real*term_top_2)/S
-        return rst_real, rst_imag
 
+    def _calculate_kernel(self, omega: np.ndarray, Ms: float, Hk: float, rho: float, t: float):
+        # 对单个样品选择计算内核, 返回(real, imag)
+        if self.calculator_type == CalculatorType.WANG:
+            # He和三个角度可以是数组, 结果的形状为 broadcast(He, phi_0, delta, beta).shape + (num_points,)
+            miu = wang_eddy_mu(omega, Ms, Hk, self.alpha, self.He, self.phi_0, self.delta, self.beta, rho, t,
+                               self.constants)
+            return miu.real, miu.imag
+        if self.kernel_type == KernelType.COMPLEX:
+            miu = shimada_mu(omega, Ms, Hk, self.alpha, rho, t, self.constants)
+            return miu.real, miu.imag
+        miu_real, miu_imag = shimada_mu_parts(omega, Ms, Hk, self.alpha, self.constants)
+        if rho == 0.:
+            return miu_real, miu_imag
+        return eddy_mu_parts(omega, miu_real, miu_imag, rho, t, self.constants)
+
+    @staticmethod
+    def _thread_count(num_points: int) -> int:
+        return max(1, min(os.cpu_count() or 1, num_points // THREAD_MIN_POINTS))
+
+    def _calculate_threaded(self, omega: np.ndarray, Ms: float, Hk: float, rho: float, t: float, threads: int):
+        # numpy的ufunc在计算时释放GIL, 各频率块可以在线程中并行
+        num_points = omega.shape[0]
+        chunk_size = min(THREAD_CHUNK_POINTS, -(-num_points // threads))
+
+        def run(start: int):
+            return self._calculate_kernel(omega[start:start + chunk_size], Ms, Hk, rho, t)
+
+        if threads == 1:
+            # 单核时也分块计算, 临时数组小, 缓存命中率更高
+            chunks = list(map(run, range(0, num_points, chunk_size)))
+        else:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                chunks = list(executor.map(run, range(0, num_points, chunk_size)))
+        miu_real = np.concatenate([chunk[0] for chunk in chunks], axis=-1)
+        miu_imag = np.concatenate([chunk[1] for chunk in chunks], axis=-1)
+        return miu_real, miu_imag
+
+    def _angles_are_scalar(self) -> bool:
+        return all(np.ndim(x) == 0 for x in (self.He, self.phi_0, self.delta, self.beta))
+
+    def _use_cache(self, num_points: int) -> bool:
+        # 角度为数组时结果形状随角度变化, 点数超过上限时结果太大, 都不使用缓存
+        return self.use_cache and self._angles_are_scalar() and int(num_points) <= RESULT_CACHE_MAX_POINTS
+
+    def _cache_key(self, f_info: Tuple[float, float], num_points: int, spacing: FrequencySpacing,
+                   alpha: float, Ms: float, Hk: float, rho: float, t: float) -> tuple:
+        return ResultCache.make_key(self.calculator_type, self.kernel_type, self.unit_type, alpha, self.He, self.phi_0, self.delta,
+                                    self.beta, Ms, Hk, rho, t, f_info[0], f_info[1], int(num_points), spacing)
+
+    def _calculate_columns(self, omega: np.ndarray, Ms: np.ndarray, Hk: np.ndarray, rho: np.ndarray,
+                           t: np.ndarray, alpha: np.ndarray = None) -> np.ndarray:
+        # Ms/Hk/rho/t(/alpha)为(N,1)列向量, 返回(N, num_points)的复数磁导率
+        # WANG的He和角度为数组时, 样品轴在最前面, 返回(N, *broadcast(He, phi_0, delta, beta).shape, num_points)
+        if alpha is None:
+            alpha = self.alpha
+        if self.calculator_type == CalculatorType.WANG:
+            angle_ndim = len(np.broadcast_shapes(*(np.shape(x) for x in (self.He, self.phi_0, self.delta, self.beta))))
+            if angle_ndim:
+                Ms, Hk, rho, t = (x.reshape(x.shape[:1] + (1,) * (angle_ndim + 1)) for x in (Ms, Hk, rho, t))
+                if np.ndim(alpha):
+                    alpha = alpha.reshape(alpha.shape[:1] + (1,) * (angle_ndim + 1))
+            return wang_eddy_mu(omega, Ms, Hk, alpha, self.He, self.phi_0, self.delta, self.beta, rho, t,
+                                self.constants)
+        if self.kernel_type == KernelType.COMPLEX:
+            return shimada_mu(omega, Ms, Hk, alpha, rho, t, self.constants)
+        miu_real, miu_imag = shimada_mu_parts(omega, Ms, Hk, alpha, self.constants)
+        eddy = rho[:, 0] != 0.
+        if np.all(eddy):
+            miu_real, miu_imag = eddy_mu_parts(omega, miu_real, miu_imag, rho, t, self.constants)
+        elif np.any(eddy):
+            # rho=0的样品没有涡流项, 只对rho!=0的行计算涡流修正
+            miu_real[eddy], miu_imag[eddy] = eddy_mu_parts(omega, miu_real[eddy], miu_imag[eddy], rho[eddy],
+                                                           t[eddy], self.constants)
+        return miu_real + 1j * miu_imag
 
 
 
@@ -0,0 +1,178 @@
+# 大量独立宏自旋的时域LLG方程积分, 每个自旋单独控制步长的 Dormand-Prince 5(4) 方法
+# dm/dt = -γ/(1+α^2)*[m×H_eff + α*m×(m×H_eff)]
+# H_eff = H_k*(m·u)u - M_S/μ_0*(m·n)n + He + h(t), u为易轴(e.a.), n为膜面法线
+from typing import Callable, Sequence, Tuple, Union
+import numpy as np
+
+from utils.my_constant import constants_for_llg, ResolvedConstants, UnitType
+
+# Dormand-Prince 5(4) 系数
+_C = np.array([0., 1. / 5., 3. / 10., 4. / 5., 8. / 9., 1., 1.])
+_A = [[],
+      [1. / 5.],
+      [3. / 40., 9. / 40.],
+      [44. / 45., -56. / 15., 32. / 9.],
+      [19372. / 6561., -25360. / 2187., 64448. / 6561., -212. / 729.],
+      [9017. / 3168., -355. / 33., 46732. / 5247., 49. / 176., -5103. / 18656.],
+      [35. / 384., 0., 500. / 1113., 125. / 192., -2187. / 6784., 11. / 84.]]
+_B5 = np.array([35. / 384., 0., 500. / 1113., 125. / 192., -2187. / 6784., 11. / 84., 0.])
+_B4 = np.array([5179. / 57600., 0., 7571. / 16695., 393. / 640., -92097. / 339200., 187. / 2100., 1. / 40.])
+_E = _B5 - _B4
+
+
+def _cross(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # (3,n)数组逐列叉乘, 每个分量连续存放, 比np.cross的通用实现开销小
+    out = np.empty(np.broadcast_shapes(a.shape, b.shape))
+    np.subtract(a[1] * b[2], a[2] * b[1], out=out[0])
+    np.subtract(a[2] * b[0], a[0] * b[2], out=out[1])
+    np.subtract(a[0] * b[1], a[1] * b[0], out=out[2])
+    return out
+
+
+class LLGEnsembleIntegrator:
+    def __init__(self, Ms: np.ndarray, Hk: np.ndarray, alpha: np.ndarray, He: np.ndarray = None,
+                 field_func: Callable[[np.ndarray, np.ndarray], np.ndarray] = None,
+                 easy_axis: Sequence[float] = (1., 0., 0.), normal: Sequence[float] = (0., 0., 1.),
+                 rtol: float = 1e-6, atol: float = 1e-9, max_steps: int = 10 ** 6,
+                 constants: ResolvedConstants = None):
+        # Ms[T], Hk[A/m], alpha 为长度M的数组(或标量), He[A/m]为(M,3)或(3,)的直流外场
+        # field_func(t, index) 返回 index(编号数组或切片)对应自旋在各自时刻 t 的附加场(n,3), 用于高频激励
+        Ms, Hk, alpha = np.broadcast_arrays(*(np.atleast_1d(np.asarray(x, dtype=np.float64))
+                                              for x in (Ms, Hk, alpha)))
+        if constants is None:
+            constants = constants_for_llg.resolve(UnitType.SI)
+        self.constants = constants
+        self.num_spins = Ms.shape[0]
+        self.Ms_over_miu_0 = Ms / constants.miu_0
+        self.Hk = Hk
+        self.alpha = alpha
+        # γ/(1+α^2)
+        self.gamma_prime = constants.gamma / (1. + np.square(alpha))
+        if He is None:
+            He = np.zeros(3)
+        # 内部按(3,M)存放, 各分量在内存中连续
+        self.He = np.ascontiguousarray(np.broadcast_to(np.asarray(He, dtype=np.float64), (self.num_spins, 3)).T)
+        self.has_He = bool(np.any(self.He))
+        self.field_func = field_func
+        self.easy_axis = np.asarray(easy_axis, dtype=np.float64) / np.linalg.norm(easy_axis)
+        self.normal = np.asarray(normal, dtype=np.float64) / np.linalg.norm(normal)
+        self.rtol = rtol
+        self.atol = atol
+        self.max_steps = max_steps
+
+    def effective_field(self, t: np.ndarray, m: np.ndarray, index: Union[np.ndarray, slice]) -> np.ndarray:
+        # m和返回值的形状为(3,n), index为自旋编号数组, 所有自旋都在推进时为slice(None)
+        H = np.multiply.outer(self.easy_axis, self.Hk[index] * (self.easy_axis @ m))
+        H -= np.multiply.outer(self.normal, self.Ms_over_miu_0[index] * (self.normal @ m))
+        if self.has_He:
+            H += self.He[:, index]
+        if self.field_func is not None:
+            H += self.field_func(t, index).T
+        return H
+
+    def derivative(self, t: np.ndarray, m: np.ndarray, index: Union[np.ndarray, slice]) -> np.ndarray:
+        H = self.effective_field(t, m, index)
+        m_x_H = _cross(m, H)
+        m_x_m_x_H = _cross(m, m_x_H)
+        m_x_m_x_H *= self.alpha[index]
+        m_x_H += m_x_m_x_H
+        m_x_H *= -self.gamma_prime[index]
+        return m_x_H
+
+    def initial_step(self) -> np.ndarray:
+        # 取最快进动周期的1/100
+        H_scale = self.Hk + self.Ms_over_miu_0 + np.linalg.norm(self.He, axis=0)
+        return 2. * np.pi / (100. * self.constants.gamma * H_scale)
+
+    def integrate(self, m0: np.ndarray, t_eval: Sequence[float], t0: float = 0.,
+                  dt0: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        # 从t0积分到t_eval中的每个时刻, 返回(t_eval, m), m.shape = (len(t_eval), M, 3)
+        t_eval = np.asarray(t_eval, dtype=np.float64)
+        m = np.array(np.broadcast_to(m0, (self.num_spins, 3)).T, dtype=np.float64, order='C')
+        m /= np.linalg.norm(m, axis=0)
+        t = np.full(self.num_spins, t0, dtype=np.float64)
+        dt = self.initial_step() if dt0 is None else np.broadcast_to(dt0, (self.num_spins,)).astype(np.float64)
+        result = np.empty((t_eval.shape[0], 3, self.num_spins), dtype=np.float64)
+        # FSAL: 第7级在接受的5阶解处求值, 即下一步的第1级; 被拒绝的步t和m不变, 第1级也不变
+        k_first = np.empty_like(m)
+        has_first = np.zeros(self.num_spins, dtype=bool)
+        steps = 0
+        for i_eval, t_target in enumerate(t_eval):
+            # 只推进尚未到达t_target的自旋
+            active = np.flatnonzero(t < t_target)
+            while active.size:
+                steps += 1
+                if steps > self.max_steps:
+                    raise RuntimeError(f"LLG integration exceeded max_steps={self.max_steps}")
+                # 全部自旋都在推进时用切片, 避免花式索引的复制
+                index = slice(None) if active.size == self.num_spins else active
+                t_a, m_a = t[index], m[:, index]
+                # 最后一步正好落在t_target上
+                h = np.minimum(dt[active], t_target - t_a)
+                missing = np.flatnonzero(~has_first[active])
+                if missing.size:
+                    k_first[:, active[missing]] = self.derivative(t_a[missing], m_a[:, missing], active[missing])
+                    has_first[active[missing]] = True
+                k = [k_first[:, index]]
+                for stage in range(1, 7):
+                    m_stage = m_a.copy()
+                    for j, a in enumerate(_A[stage]):
+                        if a != 0.:
+                            m_stage += (h * a) * k[j]
+                    k.append(self.derivative(t_a + _C[stage] * h, m_stage, index))
+                m_new = m_stage  # 第7级的输入即5阶解
+                error = np.zeros_like(m_a)
+                for j in range(7):
+                    if _E[j] != 0.:
+                        error += _E[j] * k[j]
+                error *= h
+                scale = self.atol + self.rtol * np.maximum(np.abs(m_a), np.abs(m_new))
+                error_norm = np.max(np.abs(error) / scale, axis=0)
+                accept = error_norm <= 1.
+                # 步长控制: h*0.9*err^(-1/5), 每步最多放大5倍/缩小5倍
+                factor = np.clip(0.9 * np.power(np.maximum(error_norm, 1e-10), -0.2), 0.2, 5.)
+                accepted = active[accept]
+                m_accepted = m_new[:, accept]
+                m[:, accepted] = m_accepted / np.linalg.norm(m_accepted, axis=0)
+                # 接受的自旋下一步的第1级为k[6], 拒绝的不变; 全部自旋推进时k[0]是k_first的视图
+                np.copyto(k[0], k[6], where=accept)
+                if not isinstance(index, slice):
+                    k_first[:, active] = k[0]
+                t[accepted] = np.where(h[accept] == t_target - t_a[accept], t_target, t_a[accept] + h[accept])
+                # 被截断且接受的最后一步不改变下一段的步长
+                dt[active] = np.where((h < dt[active]) & accept, dt[active], h * factor)
+                active = active[t[active] < t_target]
+            result[i_eval] = m
+        return t_eval, result.transpose(0, 2, 1)
+
+
+if __name__ == '__main__':
+    import time
+    from physical_model.permeability import shimada_mu_parts
+
+    # 用小幅高频场h*y驱动沿x(e.a.)磁化的薄膜, 每个自旋对应一个频率, 锁相得到χ并与 shimada_mu_parts 比较
+    # 频率取锁相窗口的整数倍, 每组40个频率重复250次, 共1e4个自旋
+    Ms, Hk, alpha = 1.0, 800., 0.02
+    t_settle, t_window = 5e-9, 20e-9
+    freq = np.tile(np.arange(1, 41) / t_window, 250)
+    h_amplitude = 0.01 * Hk
+    omega = 2 * np.pi * freq
+
+    def drive(t, index):
+        h = np.zeros((t.shape[0], 3))
+        h[:, 1] = h_amplitude * np.cos(omega[index] * t)
+        return h
+
+    integrator = LLGEnsembleIntegrator(Ms=np.full(freq.shape, Ms), Hk=Hk, alpha=alpha, field_func=drive)
+    t_eval = t_settle + np.arange(400) * t_window / 400
+    start = time.perf_counter()
+    t_eval, m = integrator.integrate(m0=(1., 0., 0.), t_eval=t_eval)
+    print(f"{freq.shape[0]} spins integrated in {time.perf_counter() - start:.2f}s")
+    # 锁相: χ = M_S/μ_0*<m_y*e^(iωt)>*2/h
+    phase = np.exp(1j * omega[None, :] * t_eval[:, None])
+    chi = 2. * np.mean(m[:, :, 1] * phase, axis=0) * integrator.Ms_over_miu_0 / h_amplitude
+
+    miu_real, miu_imag = shimada_mu_parts(omega, Ms, Hk, alpha, integrator.constants)
+    for i in range(0, 40, 4):
+        print(f"f={freq[i]:.3e}Hz\tLLG: {1 + chi[i].real:.2f}{chi[i].imag:+.2f}j"
+              f"\tShimada: {miu_real[i]:.2f}{miu_imag[i]:+.2f}j")
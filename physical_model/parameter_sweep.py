@@ -0,0 +1,131 @@
+# 在 alpha, Ms, Hk, rho, t 的笛卡尔积网格上批量计算 Shimada 模型
+from typing import Dict, List, Tuple
+import numpy as np
+
+from physical_model.landau_lifshitz_gilbert import LandauLifshitzGilbertCalculator, CalculatorType
+from utils.my_constant import UnitType
+
+# 可扫描的参数(SI单位): 衰减常数, 饱和磁化[T], 各向异性场[A/m], 电阻率[Ω*m], 膜厚[m]
+SWEEP_PARAMETERS = ('alpha', 'Ms', 'Hk', 'rho', 't')
+
+
+class SweepAxis:
+    def __init__(self, name: str, from_value: float, to_value: float, num: int, is_log: bool = False):
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError(f"Unknown sweep parameter: {name}, expected one of {SWEEP_PARAMETERS}")
+        if num < 1:
+            raise ValueError(f"Sweep axis {name} needs at least one point")
+        self.name = name
+        self.from_value = from_value
+        self.to_value = to_value
+        self.num = num
+        self.is_log = is_log
+        if is_log:
+            self.values = np.logspace(np.log10(from_value), np.log10(to_value), num=num)
+        else:
+            self.values = np.linspace(from_value, to_value, num=num)
+
+    def __len__(self):
+        return self.num
+
+    def __str__(self):
+        return f"{self.name}: {self.from_value} ~ {self.to_value}, {self.num} points, LOG? : {self.is_log}"
+
+
+class SweepResult:
+    def __init__(self, axes: List[SweepAxis], freq: np.ndarray, miu: np.ndarray):
+        self.axes = axes
+        self.freq = freq
+        # miu.shape = (len(axes[0]), ..., len(axes[-1]), num_points)
+        self.miu = miu
+        self.dims = tuple(axis.name for axis in axes) + ('freq',)
+
+    def coords(self) -> Dict[str, np.ndarray]:
+        coords = {axis.name: axis.values for axis in self.axes}
+        coords['freq'] = self.freq
+        return coords
+
+    def sel(self, **kwargs) -> np.ndarray:
+        # 按最接近的坐标值取切片, 例如 result.sel(alpha=0.01, t=1e-6)
+        index = []
+        for axis in self.axes:
+            if axis.name in kwargs:
+                index.append(int(np.argmin(np.abs(axis.values - kwargs.pop(axis.name)))))
+            else:
+                index.append(slice(None))
+        if kwargs:
+            raise KeyError(f"Unknown sweep dims: {list(kwargs.keys())}")
+        return self.miu[tuple(index)]
+
+
+class ParameterSweep:
+    # 每个网格点在一次 eddy_mu_parts 中大约产生的同尺寸临时数组个数
+    temporaries_per_point = 24
+
+    def __init__(self, axes: List[SweepAxis], fixed: Dict[str, float], f_info: Tuple[float, float],
+                 num_points: int, chunk_size: int = None, max_chunk_memory: int = 256 * 1024 ** 2):
+        names = [axis.name for axis in axes]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicated sweep axes: {names}")
+        missing = [name for name in SWEEP_PARAMETERS if name not in names and name not in fixed]
+        if missing:
+            raise ValueError(f"Parameters neither swept nor fixed: {missing}")
+        self.axes = axes
+        self.fixed = {name: value for name, value in fixed.items() if name not in names}
+        self.f_info = f_info
+        self.num_points = num_points
+        self.shape = tuple(len(axis) for axis in axes)
+        self.size = int(np.prod(self.shape))
+        if chunk_size is None:
+            # 按临时数组的内存占用决定每块计算的网格点数
+            bytes_per_row = self.temporaries_per_point * num_points * np.dtype(np.float64).itemsize
+            chunk_size = max(1, max_chunk_memory // bytes_per_row)
+        self.chunk_size = int(chunk_size)
+        self.calculator = LandauLifshitzGilbertCalculator(calculator_type=CalculatorType.SHIMADA,
+                                                          unit_type=UnitType.SI,
+                                                          alpha=fixed.get('alpha', 0.),
+                                                          He=0., phi_0=0., delta=0., beta=np.pi / 2,
+                                                          use_cache=False)
+
+    def parameter_columns(self, start: int, stop: int) -> Dict[str, np.ndarray]:
+        # 平铺索引[start, stop)对应的各参数取值(C顺序)
+        index = np.unravel_index(np.arange(start, stop), self.shape)
+        columns = {axis.name: axis.values[axis_index] for axis, axis_index in zip(self.axes, index)}
+        for name, value in self.fixed.items():
+            columns[name] = np.full(stop - start, value, dtype=np.float64)
+        return columns
+
+    def evaluate_chunk(self, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray]:
+        columns = self.parameter_columns(start, stop)
+        return self.calculator.calculate_batch(f_info=self.f_info, num_points=self.num_points,
+                                               Ms=columns['Ms'], Hk=columns['Hk'],
+                                               rho=columns['rho'], t=columns['t'],
+                                               alpha=columns['alpha'])
+
+    def chunks(self):
+        for start in range(0, self.size, self.chunk_size):
+            yield start, min(start + self.chunk_size, self.size)
+
+    def run(self, out: np.ndarray = None) -> SweepResult:
+        if out is None:
+            out = np.empty(self.shape + (self.num_points,), dtype=np.complex128)
+        elif out.shape != self.shape + (self.num_points,):
+            raise ValueError(f"Output shape {out.shape} does not match {self.shape + (self.num_points,)}")
+        flat_out = out.reshape(self.size, self.num_points)
+        freq = None
+        for start, stop in self.chunks():
+            freq, flat_out[start:stop] = self.evaluate_chunk(start, stop)
+        return SweepResult(self.axes, freq, out)
+
+
+if __name__ == '__main__':
+    sweep = ParameterSweep(axes=[SweepAxis('alpha', 1e-3, 1e-1, 20, is_log=True),
+                                 SweepAxis('Hk', 10., 1000., 30, is_log=True),
+                                 SweepAxis('rho', 1e-7, 1e-5, 10, is_log=True),
+                                 SweepAxis('t', 1e-7, 1e-5, 10, is_log=True)],
+                           fixed={'Ms': 1.5},
+                           f_info=(1., 1e10),
+                           num_points=200)
+    result = sweep.run()
+    print(result.dims, result.miu.shape)
+    print(result.sel(alpha=0.01, Hk=100., rho=1e-6, t=1e-6)[::20])
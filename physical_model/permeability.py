@@ -0,0 +1,226 @@
+# 磁导率模型的纯函数: 所有输入(频率, 样品参数, 物理常数)都通过参数传入, 不读写任何全局或对象状态
+# constants 为 constants_for_llg.resolve(unit_type) 返回的不可变常数快照, 可以在多个线程中同时调用
+# Ms, Hk, alpha, rho, t 可以是标量或(N,1)列向量, 与(num_points,)的omega广播
+# 单位与constants的单位制一致: SI为 Ms=μ_0*M_S[T], H[A/m], ρ[Ω*m], t[m]
+# CGS为 Ms=4πM_S[G], H[Oe], ρ[abΩ*cm], t[cm], 公式中的μ_0为1, 涡流项中的μ_0'为4π
+from typing import Tuple
+import numpy as np
+
+from physical_model.stoner_wohlfarth import equilibrium_phi_0
+from physical_model.workspace import PermeabilityWorkspace
+from utils.my_constant import ResolvedConstants
+
+
+def shimada_mu_parts(omega, Ms, Hk, alpha, constants: ResolvedConstants) -> Tuple[np.ndarray, np.ndarray]:
+    miu_0 = constants.miu_0
+    gamma = constants.gamma
+    # M_S/(μ_0*H_k)
+    term_1 = Ms/(miu_0*Hk)
+    # ω_r^2 = γ^2*H_k*(H_k+M_S/μ_0)
+    omega_r_square = gamma**2*Hk*(Hk+Ms/miu_0)
+    # λ' = (M_S*α*γ)/μ_0
+    lambda_prime = Ms*alpha*gamma/miu_0
+    # ω_r^2-ω^2
+    term_2_top_1 = omega_r_square - np.square(omega)
+    # λ'*ω
+    term_2_top_2 = lambda_prime*omega
+    term_2_bot = np.square(term_2_top_1) + np.square(term_2_top_2)
+    rst_real = term_1*omega_r_square*term_2_top_1/term_2_bot+1
+    rst_imag = term_1*omega_r_square*term_2_top_2/term_2_bot
+    return rst_real, rst_imag
+
+
+def eddy_mu_parts(omega, miu_r_real, miu_r_imag, rho, t,
+                  constants: ResolvedConstants) -> Tuple[np.ndarray, np.ndarray]:
+    miu_0 = constants.miu_0_eddy  # 涡流项的μ_0'
+    # k = t√(ωρ)
+    k = t*np.sqrt(omega/rho)
+    # μ_r = μ_√(μ_r1^2+μ_r2^2)
+    miu_r = np.sqrt(np.square(miu_r_real)+np.square(miu_r_imag))
+    # A = √(μ_0'/2*(μ_r2+μ_r))
+    A = np.sqrt(0.5*miu_0*(miu_r_imag+miu_r))
+    # B = sgn(μ_r1)*√(μ_0'/2*(-μ_r2+μ_r)), A+iB = √(iμ_0'(μ_r1-iμ_r2))
+    B = np.copysign(np.sqrt(0.5*miu_0*(-miu_r_imag+miu_r)), miu_r_real)
+    # 分子分母同除cosh(kA), 厚膜高频时kA很大也不会溢出
+    kA = k*A
+    kB = k*B
+    # sech(kA) = 2e^(-kA)/(1+e^(-2kA)), kA>=0
+    exp_neg_kA = np.exp(-kA)
+    sech_kA = 2.*exp_neg_kA/(1.+np.square(exp_neg_kA))
+    tanh_kA = np.tanh(kA)
+    sin_kB = np.sin(kB)*sech_kA
+    # S = k/2*μ_0'*μ_r*[cosh(kA)+cos(kB)]/cosh(kA) = k/2*μ_0'*μ_r*[1+cos(kB)sech(kA)]
+    S = 0.5*k*miu_0*miu_r*(1.+np.cos(kB)*sech_kA)
+    # [A*sinh(kA)+B*sin(kB)]/cosh(kA) = A*tanh(kA)+B*sin(kB)sech(kA)
+    term_top_1 = A * tanh_kA + B * sin_kB
+    # [B*sinh(kA)-A*sin(kB)]/cosh(kA) = B*tanh(kA)-A*sin(kB)sech(kA)
+    term_top_2 = B * tanh_kA - A * sin_kB
+    #
+    rst_real = (miu_r_real*term_top_1 - miu_r_imag*term_top_2)/S
+    rst_imag = (miu_r_imag*term_top_1 + miu_r_real*term_top_2)/S
+    return rst_real, rst_imag
+
+
+def shimada_mu_complex(omega, Ms, Hk, alpha, constants: ResolvedConstants) -> np.ndarray:
+    miu_0 = constants.miu_0
+    gamma = constants.gamma
+    # μ = 1 + M_S/(μ_0*H_k)*ω_r^2/(ω_r^2-ω^2-iλ'ω)
+    omega_r_square = gamma**2*Hk*(Hk+Ms/miu_0)
+    lambda_prime = Ms*alpha*gamma/miu_0
+    term_1 = Ms/(miu_0*Hk)*omega_r_square
+    shape = np.broadcast_shapes(np.shape(omega_r_square), np.shape(lambda_prime), np.shape(omega))
+    miu = np.empty(shape, dtype=np.complex128)
+    np.subtract(omega_r_square, np.square(omega), out=miu.real)
+    np.multiply(-lambda_prime, omega, out=miu.imag)
+    np.divide(term_1, miu, out=miu)
+    miu += 1.
+    return miu
+
+
+def eddy_mu_complex(omega, miu, rho, t, constants: ResolvedConstants) -> np.ndarray:
+    # 涡流修正只用到μ, 也用于WANG模型
+    # x = t/2*√(-iμ_0'*μ*ω/ρ)
+    x = np.multiply(miu, -0.25j*constants.miu_0_eddy*t*t/rho)
+    x *= omega
+    np.sqrt(x, out=x)
+    # μ_eff = μ*tanh(x)/x
+    rst = np.tanh(x)
+    rst /= x
+    rst *= miu
+    return rst
+
+
+def wang_mu(omega, Ms, Hk, alpha, He, phi_0, delta, beta, constants: ResolvedConstants) -> np.ndarray:
+    # He, delta, beta 增加频率轴后与omega广播
+    He, delta, beta = (np.asarray(x, dtype=np.float64)[..., None] for x in (He, delta, beta))
+    if phi_0 is None:
+        # phi_0未指定时由He, δ, H_k求Stoner-Wohlfarth平衡角
+        phi_0 = equilibrium_phi_0(He, delta, Hk)
+    else:
+        phi_0 = np.asarray(phi_0, dtype=np.float64)[..., None]
+    miu_0 = constants.miu_0
+    gamma = constants.gamma
+    # 沿M方向的外场分量 He*cos(ϕ_0-δ)
+    He_parallel = He*np.cos(phi_0-delta)
+    # 面内刚度 H_1 = H_k*cos(2ϕ_0)+He*cos(ϕ_0-δ)
+    H_1 = Hk*np.cos(2.*phi_0)+He_parallel
+    # 面外刚度 H_2 = H_k*cos^2(ϕ_0)+He*cos(ϕ_0-δ)+M_S/μ_0
+    H_2 = Hk*np.square(np.cos(phi_0))+He_parallel+Ms/miu_0
+    # ω_r^2 = γ^2*H_1*H_2
+    omega_r_square = gamma**2*H_1*H_2
+    # λ = α*γ*(H_1+H_2)
+    lambda_prime = alpha*gamma*(H_1+H_2)
+    # 只有垂直于M的高频场分量h*sin(β-ϕ_0)起作用, 沿h方向测得的磁导率再乘一次sin(β-ϕ_0)
+    # μ = 1 + γ^2*M_S/μ_0*H_2*sin^2(β-ϕ_0)/(ω_r^2-ω^2-iλω)
+    term_1 = gamma**2*Ms/miu_0*H_2*np.square(np.sin(beta-phi_0))
+    shape = np.broadcast_shapes(np.shape(term_1), np.shape(omega_r_square), np.shape(lambda_prime),
+                                np.shape(omega))
+    miu = np.empty(shape, dtype=np.complex128)
+    np.subtract(omega_r_square, np.square(omega), out=miu.real)
+    np.multiply(-lambda_prime, omega, out=miu.imag)
+    np.divide(term_1, miu, out=miu)
+    miu += 1.
+    return miu
+
+
+def shimada_mu_into(omega, Ms, Hk, alpha, constants: ResolvedConstants, workspace: PermeabilityWorkspace,
+                    out: np.ndarray) -> np.ndarray:
+    # 与shimada_mu_complex相同, 所有数组运算都通过out=写入已分配的数组
+    miu_0 = constants.miu_0
+    gamma = constants.gamma
+    omega_r_square = gamma**2*Hk*(Hk+Ms/miu_0)
+    lambda_prime = Ms*alpha*gamma/miu_0
+    term_1 = Ms/(miu_0*Hk)*omega_r_square
+    np.square(omega, out=workspace.scratch)
+    np.subtract(omega_r_square, workspace.scratch, out=out.real)
+    np.multiply(omega, -lambda_prime, out=out.imag)
+    np.divide(term_1, out, out=out)
+    out += 1.
+    return out
+
+
+def shimada_eddy_mu_into(omega, Ms, Hk, alpha, rho, t, constants: ResolvedConstants,
+                         workspace: PermeabilityWorkspace, out: np.ndarray) -> np.ndarray:
+    miu = shimada_mu_into(omega, Ms, Hk, alpha, constants, workspace, workspace.miu)
+    x = workspace.x
+    # x = t/2*√(-iμ_0'*μ*ω/ρ)
+    np.multiply(miu, -0.25j*constants.miu_0_eddy*t*t/rho, out=x)
+    np.multiply(x, omega, out=x)
+    np.sqrt(x, out=x)
+    # μ_eff = μ*tanh(x)/x
+    np.tanh(x, out=out)
+    np.divide(out, x, out=out)
+    np.multiply(out, miu, out=out)
+    return out
+
+
+def shimada_mu_jacobian(omega, Ms, Hk, alpha, num_parameters: int,
+                        constants: ResolvedConstants) -> Tuple[np.ndarray, np.ndarray]:
+    # μ = 1 + T/D, m = M_S/μ_0, T = χ_0*ω_r^2 = γ^2*m*(H_k+m), D = ω_r^2-ω^2-iλ'ω
+    # 返回μ和前三个参数(α, M_S, H_k)的偏导数, 其余num_parameters-3个偏导数为0
+    miu_0 = constants.miu_0
+    gamma = constants.gamma
+    m = Ms/miu_0
+    omega_r_square = gamma**2*Hk*(Hk+m)
+    lambda_prime = alpha*gamma*m
+    term_top = gamma**2*m*(Hk+m)
+    shape = np.broadcast_shapes(np.shape(omega_r_square), np.shape(lambda_prime), np.shape(omega))
+    inv_D = np.empty(shape, dtype=np.complex128)
+    np.subtract(omega_r_square, np.square(omega), out=inv_D.real)
+    np.multiply(-lambda_prime, omega, out=inv_D.imag)
+    np.reciprocal(inv_D, out=inv_D)
+    chi = term_top*inv_D
+    miu = chi + 1.
+    # ∂μ/∂p = (∂T/∂p - χ*∂D/∂p)/D
+    jac = np.zeros(shape[:-1] + (num_parameters,) + shape[-1:], dtype=np.complex128)
+    # ∂D/∂α = -iγmω, ∂T/∂α = 0
+    jac[..., 0, :] = chi*(1j*gamma*m*omega)*inv_D
+    # ∂T/∂M_S = γ^2*(H_k+2m)/μ_0, ∂D/∂M_S = γ^2*H_k/μ_0 - iαγω/μ_0
+    jac[..., 1, :] = (gamma**2*(Hk+2.*m)/miu_0
+                      - chi*(gamma**2*Hk/miu_0 - 1j*alpha*gamma/miu_0*omega))*inv_D
+    # ∂T/∂H_k = γ^2*m, ∂D/∂H_k = γ^2*(2H_k+m)
+    jac[..., 2, :] = (gamma**2*m - chi*(gamma**2*(2.*Hk+m)))*inv_D
+    return miu, jac
+
+
+def eddy_mu_jacobian(omega, miu, jac, rho, t, constants: ResolvedConstants) -> Tuple[np.ndarray, np.ndarray]:
+    # μ_eff = μ*F(x), F = tanh(x)/x, x = t/2*√(-iμ_0'*μ*ω/ρ)
+    # x*F'(x) = 1-tanh^2(x)-F, ∂x/∂μ = x/(2μ), ∂x/∂t = x/t, ∂x/∂ρ = -x/(2ρ)
+    # jac的第3, 4个参数为ρ和t, 原地更新后返回
+    x = np.multiply(miu, -0.25j*constants.miu_0_eddy*t*t/rho)
+    x *= omega
+    np.sqrt(x, out=x)
+    tanh_x = np.tanh(x)
+    F = tanh_x/x
+    sech_square = 1.-np.square(tanh_x)
+    # μ*x*F'(x)
+    miu_x_dF = miu*(sech_square-F)
+    # ∂μ_eff/∂μ = F + x*F'/2, 用于α, M_S, H_k的链式法则
+    jac[..., :3, :] *= (0.5*(F+sech_square))[..., None, :]
+    jac[..., 3, :] = -0.5*miu_x_dF/rho
+    jac[..., 4, :] = miu_x_dF/t
+    return miu*F, jac
+
+
+def _with_eddy(omega, miu, rho, t, constants: ResolvedConstants) -> np.ndarray:
+    # rho为标量或(N,1,...,1)列向量, 只对rho!=0的样品计算涡流修正
+    if np.ndim(rho) == 0:
+        return miu if rho == 0. else eddy_mu_complex(omega, miu, rho, t, constants)
+    eddy = np.asarray(rho).reshape(np.shape(rho)[0], -1)[:, 0] != 0.
+    if np.all(eddy):
+        return eddy_mu_complex(omega, miu, rho, t, constants)
+    if np.any(eddy):
+        miu = np.array(miu)
+        t = np.broadcast_to(t, np.shape(rho))
+        miu[eddy] = eddy_mu_complex(omega, miu[eddy], rho[eddy], t[eddy], constants)
+    return miu
+
+
+def shimada_mu(omega, Ms, Hk, alpha, rho, t, constants: ResolvedConstants) -> np.ndarray:
+    # Shimada模型+涡流修正的复数磁导率 μ'+iμ''
+    return _with_eddy(omega, shimada_mu_complex(omega, Ms, Hk, alpha, constants), rho, t, constants)
+
+
+def wang_eddy_mu(omega, Ms, Hk, alpha, He, phi_0, delta, beta, rho, t, constants: ResolvedConstants) -> np.ndarray:
+    # WANG模型+涡流修正的复数磁导率, 结果的形状为 broadcast(He, phi_0, delta, beta).shape + (num_points,)
+    return _with_eddy(omega, wang_mu(omega, Ms, Hk, alpha, He, phi_0, delta, beta, constants), rho, t, constants)
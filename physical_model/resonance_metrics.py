@@ -0,0 +1,68 @@
+# 由 Ms, Hk, alpha 直接求共振指标, 不需要在频率上密集扫描(不含涡流项)
+# μ = 1 + χ_0*ω_r^2/(ω_r^2-ω^2-iλ'ω), χ_0 = M_S/(μ_0*H_k), 与 shimada_mu_parts 相同
+# 记 x = ω/ω_r, l = λ'/ω_r, 则 μ'' = χ_0*l*x/[(1-x^2)^2+l^2*x^2]
+import numpy as np
+
+from utils.my_constant import constants_for_llg, ResolvedConstants, UnitType
+
+
+class ResonanceMetrics:
+    def __init__(self, f_r: np.ndarray, f_peak: np.ndarray, miu_imag_peak: np.ndarray, miu_real_static: np.ndarray,
+                 f_low: np.ndarray, f_high: np.ndarray):
+        self.f_r = f_r  # 共振频率ω_r/2π, μ'=1处
+        self.f_peak = f_peak  # μ''最大处的频率
+        self.miu_imag_peak = miu_imag_peak  # μ''的最大值
+        self.miu_real_static = miu_real_static  # 静态μ' = 1+χ_0
+        self.f_low = f_low  # μ''降到峰值一半(-3dB)的低频端
+        self.f_high = f_high  # μ''降到峰值一半(-3dB)的高频端
+        self.bandwidth = f_high - f_low
+        self.Q = f_peak / self.bandwidth
+
+    def __str__(self):
+        return f"f_r={self.f_r}[Hz], f_peak={self.f_peak}[Hz], μ''_peak={self.miu_imag_peak}, " \
+               f"μ'_static={self.miu_real_static}, bandwidth={self.bandwidth}[Hz], Q={self.Q}"
+
+
+def resonance_metrics(Ms, Hk, alpha, constants: ResolvedConstants = None) -> ResonanceMetrics:
+    # Ms[T], Hk[A/m], alpha 可以是任意形状(可广播)的数组, 每个样品的计算量为O(1)
+    if constants is None:
+        constants = constants_for_llg.resolve(UnitType.SI)
+    Ms, Hk, alpha = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (Ms, Hk, alpha)))
+    miu_0 = constants.miu_0
+    gamma = constants.gamma
+    # χ_0 = M_S/(μ_0*H_k)
+    chi_0 = Ms / (miu_0 * Hk)
+    # ω_r^2 = γ^2*H_k*(H_k+M_S/μ_0)
+    omega_r = gamma * np.sqrt(Hk * (Hk + Ms / miu_0))
+    # l = λ'/ω_r = M_S*α*γ/(μ_0*ω_r)
+    l = Ms * alpha * gamma / miu_0 / omega_r
+    l_square = np.square(l)
+    # d(μ'')/dx = 0 => -3x^4+(2-l^2)x^2+1 = 0
+    x_peak = np.sqrt(((2. - l_square) + np.sqrt(np.square(2. - l_square) + 12.)) / 6.)
+    miu_imag_peak = chi_0 * l * x_peak / (np.square(1. - np.square(x_peak)) + l_square * np.square(x_peak))
+    # μ'' = μ''_peak/2 => x^4+(l^2-2)x^2-c*x+1 = 0, c = 2χ_0*l/μ''_peak
+    c = 2. * chi_0 * l / miu_imag_peak
+    # 用伴随矩阵的特征值同时求所有样品的四次方程的根
+    # 四根之和为0, 两个正实根之外的两根实部为负, 所以实部最大的两个根就是半功率点
+    companion = np.zeros(Ms.shape + (4, 4))
+    companion[..., 1, 0] = 1.
+    companion[..., 2, 1] = 1.
+    companion[..., 3, 2] = 1.
+    companion[..., 0, 3] = -1.
+    companion[..., 1, 3] = c
+    companion[..., 2, 3] = -(l_square - 2.)
+    roots = np.sort(np.linalg.eigvals(companion).real, axis=-1)[..., 2:]
+    # Newton修正两步, 低阻尼时两个根很接近
+    for _ in range(2):
+        x_square = np.square(roots)
+        p = np.square(x_square) + (l_square[..., None] - 2.) * x_square - c[..., None] * roots + 1.
+        dp = 4. * x_square * roots + 2. * (l_square[..., None] - 2.) * roots - c[..., None]
+        roots = roots - p / dp
+    f_r = omega_r / (2 * np.pi)
+    return ResonanceMetrics(f_r=f_r, f_peak=f_r * x_peak, miu_imag_peak=miu_imag_peak, miu_real_static=1. + chi_0,
+                            f_low=f_r * roots[..., 0], f_high=f_r * roots[..., 1])
+
+
+if __name__ == '__main__':
+    # Ms=1.5T, Hk=1Oe, 以及不同的alpha
+    print(resonance_metrics(1.5, 1000. / (4 * np.pi), np.array([0.001, 0.01, 0.1])))
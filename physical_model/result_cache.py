@@ -0,0 +1,65 @@
+# 计算结果的LRU缓存, 以物理参数和频率网格为键, 参数不变的样品直接返回上次的结果
+# 同一个缓存被多个线程中的计算器共用, get/put/clear在锁内完成
+import threading
+from collections import OrderedDict
+from typing import Hashable, Union
+import numpy as np
+
+
+class ResultCache:
+    def __init__(self, max_bytes: int = 256 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parameters) -> tuple:
+        # 数值统一转成float, 避免 1 和 1.0 / np.float64(1.0) 生成不同的键
+        return tuple(float(p) if isinstance(p, (int, float, np.number)) and not isinstance(p, bool) else p
+                     for p in parameters)
+
+    def get(self, key: Hashable) -> Union[np.ndarray, None]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: np.ndarray):
+        # 缓存中的数组只读, 调用者修改结果时不会污染缓存
+        if value.nbytes > self.max_bytes:
+            return
+        value.flags.writeable = False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self._entries[key] = value
+            self.nbytes += value.nbytes
+            while self.nbytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def info(self) -> str:
+        return f"ResultCache: hits={self.hits}, misses={self.misses}, entries={len(self._entries)}, " \
+               f"size={self.nbytes / 1024 ** 2:.1f}/{self.max_bytes / 1024 ** 2:.1f}MB"
+
+
+# 所有计算器共享
+result_cache = ResultCache()
@@ -0,0 +1,169 @@
+# 样品库的批量导入/导出, 列和单位与SampleTable相同: Ms[kG], Hk[Oe], ρ[μΩ*cm], t[nm]
+# CSV: 流式读写, 每次只解析chunk_rows行, 整个文件解析成功后才追加到SampleTable, 失败时表不变
+# NPZ: 每列一个数组
+# NPY: 结构化数组的.npy文件, 用内存映射打开, 不需要解析, 各列可以直接送入计算
+from itertools import islice
+from zipfile import BadZipFile
+from typing import List, Tuple
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from physical_model.landau_lifshitz_gilbert import sample_columns
+from physical_model.sample_table import SampleTable, SAMPLE_FIELDS
+from utils.my_constant import UnitType
+
+LIBRARY_DTYPE = np.dtype([(name, np.float64) for name in SAMPLE_FIELDS])
+CSV_CHUNK_ROWS = 2 ** 16
+
+
+def _csv_usecols(header: str, delimiter: str) -> List[int]:
+    # 表头中各列的位置, 按SAMPLE_FIELDS的顺序, 列名不区分大小写
+    names = [name.strip().lower() for name in header.split(delimiter)]
+    missing = [field for field in SAMPLE_FIELDS if field.lower() not in names]
+    if missing:
+        raise ValueError(f"CSV header is missing columns: {missing}")
+    return [names.index(field.lower()) for field in SAMPLE_FIELDS]
+
+
+def read_csv(path: str, table: SampleTable = None, delimiter: str = ',',
+             chunk_rows: int = CSV_CHUNK_ROWS) -> SampleTable:
+    # 追加到table(为None时新建), 第一行是表头(Ms,Hk,rho,t, 顺序任意)或直接是数据(按Ms,Hk,rho,t的顺序)
+    # 表格软件导出的CSV可能以BOM开头, 用utf-8-sig读取
+    if table is None:
+        table = SampleTable()
+    blocks = []
+    with open(path, 'r', encoding='utf-8-sig') as file:
+        first = file.readline()
+        try:
+            np.array(first.split(delimiter), dtype=np.float64)
+            usecols, pending = list(range(len(SAMPLE_FIELDS))), [first]
+        except ValueError:
+            usecols, pending = _csv_usecols(first, delimiter), []
+        while True:
+            chunk = pending + list(islice(file, chunk_rows))
+            pending = []
+            if not chunk:
+                break
+            lines = [line for line in chunk if line.strip()]
+            if lines:
+                blocks.append(np.loadtxt(lines, delimiter=delimiter, usecols=usecols, ndmin=2))
+    if blocks:
+        table.extend(*np.concatenate(blocks).T)
+    return table
+
+
+def write_csv(table: SampleTable, path: str, delimiter: str = ',', chunk_rows: int = CSV_CHUNK_ROWS):
+    columns = [table.column(name) for name in SAMPLE_FIELDS]
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(delimiter.join(SAMPLE_FIELDS) + '\n')
+        for start in range(0, len(table), chunk_rows):
+            block = np.stack([column[start:start + chunk_rows] for column in columns], axis=-1)
+            np.savetxt(file, block, fmt='%.17g', delimiter=delimiter)
+
+
+def save_npz(table: SampleTable, path: str):
+    np.savez(path, **{name: table.column(name) for name in SAMPLE_FIELDS})
+
+
+def read_npz(path: str, table: SampleTable = None) -> SampleTable:
+    # 损坏的文件(不是zip, 截断, CRC错误)统一报ValueError, 与其他格式的解析错误一致
+    if table is None:
+        table = SampleTable()
+    try:
+        with np.load(path) as data:
+            missing = [name for name in SAMPLE_FIELDS if name not in data.files]
+            if missing:
+                raise ValueError(f"NPZ file is missing columns: {missing}")
+            columns = [data[name] for name in SAMPLE_FIELDS]
+    except (BadZipFile, EOFError) as error:
+        raise ValueError(f"Corrupt NPZ file: {path}: {error}") from error
+    table.extend(*columns)
+    return table
+
+
+def save_npy(table: SampleTable, path: str):
+    library = open_memmap(path, mode='w+', dtype=LIBRARY_DTYPE, shape=(len(table),))
+    for name in SAMPLE_FIELDS:
+        library[name] = table.column(name)
+    library.flush()
+    del library
+
+
+def open_npy(path: str, mode: str = 'r') -> np.ndarray:
+    # 以内存映射打开样品库, 只读文件头, 数据在访问时才从磁盘读入
+    try:
+        library = np.load(path, mmap_mode=mode)
+    except EOFError as error:
+        raise ValueError(f"Corrupt NPY file: {path}: {error}") from error
+    if library.dtype != LIBRARY_DTYPE:
+        raise ValueError(f"Unsupported sample library dtype: {library.dtype}")
+    return library
+
+
+def read_npy(path: str, table: SampleTable = None) -> SampleTable:
+    if table is None:
+        table = SampleTable()
+    library = open_npy(path)
+    table.extend(*(library[name] for name in SAMPLE_FIELDS))
+    return table
+
+
+def library_columns(library: np.ndarray, unit_type: UnitType = UnitType.SI) -> Tuple[np.ndarray, ...]:
+    # 结构化数组(如open_npy的内存映射)换算到unit_type单位制的(Ms, Hk, rho, t), 可以直接传给calculate_batch
+    return sample_columns(*(library[name] for name in SAMPLE_FIELDS), unit_type=unit_type)
+
+
+def read_library(path: str, table: SampleTable = None) -> SampleTable:
+    # 按扩展名选择格式
+    suffix = path.rsplit('.', 1)[-1].lower()
+    if suffix == 'csv':
+        return read_csv(path, table)
+    elif suffix == 'npz':
+        return read_npz(path, table)
+    elif suffix == 'npy':
+        return read_npy(path, table)
+    else:
+        raise ValueError(f"Unknown sample library format: .{suffix}")
+
+
+def write_library(table: SampleTable, path: str):
+    suffix = path.rsplit('.', 1)[-1].lower()
+    if suffix == 'csv':
+        write_csv(table, path)
+    elif suffix == 'npz':
+        save_npz(table, path)
+    elif suffix == 'npy':
+        save_npy(table, path)
+    else:
+        raise ValueError(f"Unknown sample library format: .{suffix}")
+
+
+if __name__ == '__main__':
+    import os
+    import tempfile
+    import time
+
+    num_samples = 10 ** 6
+    rng = np.random.default_rng(0)
+    table = SampleTable()
+    table.extend(rng.uniform(5., 20., num_samples), rng.uniform(1., 100., num_samples),
+                 rng.uniform(0., 1000., num_samples), rng.uniform(100., 10000., num_samples))
+    with tempfile.TemporaryDirectory() as directory:
+        for suffix in ('csv', 'npz', 'npy'):
+            path = os.path.join(directory, f'library.{suffix}')
+            start = time.perf_counter()
+            write_library(table, path)
+            write_time = time.perf_counter() - start
+            start = time.perf_counter()
+            loaded = read_library(path)
+            read_time = time.perf_counter() - start
+            assert all(np.array_equal(loaded.column(name), table.column(name)) for name in SAMPLE_FIELDS)
+            print(f".{suffix}\tsamples={num_samples:.0e}\tsize={os.path.getsize(path) / 1024 ** 2:.1f}MB\t"
+                  f"write={write_time:.3f}s\tread={read_time:.3f}s")
+        start = time.perf_counter()
+        library = open_npy(os.path.join(directory, 'library.npy'))
+        open_time = time.perf_counter() - start
+        start = time.perf_counter()
+        Ms, Hk, rho, t = library_columns(library)
+        print(f".npy memmap\topen={open_time * 1e3:.2f}ms\tcolumns={time.perf_counter() - start:.3f}s")
+        del library
@@ -0,0 +1,177 @@
+# 按列存储的样品表, 底层为NumPy结构化数组, 每行一个样品(输入单位: Ms[kG], Hk[Oe], ρ[μΩ*cm], t[nm])
+# 追加/按id修改/按id删除都是O(1): 容量不够时成倍扩容, delete把最后一行移到被删的位置
+# remove保持其余样品的顺序(界面显示, 图例和颜色都按行号), 后面的行整体前移, O(N)
+# 列以视图的形式给出, 不复制数据; 扩容后旧的视图不再跟随表的变化, 需要重新获取
+from typing import Dict, Tuple
+import numpy as np
+
+from physical_model.landau_lifshitz_gilbert import sample_columns
+from utils.my_constant import UnitType
+
+SAMPLE_FIELDS = ('Ms', 'Hk', 'rho', 't')
+SAMPLE_DTYPE = np.dtype([('id', np.int64)] + [(name, np.float64) for name in SAMPLE_FIELDS])
+
+
+class SampleTable:
+    def __init__(self, capacity: int = 16):
+        self._data = np.zeros(max(int(capacity), 1), dtype=SAMPLE_DTYPE)
+        self._size = 0
+        self._next_id = 0
+        self._rows: Dict[int, int] = {}  # id -> 行号
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, sample_id: int):
+        return sample_id in self._rows
+
+    def _reserve(self, size: int):
+        capacity = self._data.shape[0]
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        data = np.zeros(capacity, dtype=SAMPLE_DTYPE)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+
+    def append(self, Ms: float, Hk: float, rho: float, t: float) -> int:
+        # 返回新样品的id, id不随删除引起的行移动而改变
+        self._reserve(self._size + 1)
+        sample_id = self._next_id
+        self._data[self._size] = (sample_id, Ms, Hk, rho, t)
+        self._rows[sample_id] = self._size
+        self._size += 1
+        self._next_id += 1
+        return sample_id
+
+    def extend(self, Ms, Hk, rho, t) -> np.ndarray:
+        # 整列追加多个样品, 返回新样品的id数组
+        Ms, Hk, rho, t = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64).ravel() for x in (Ms, Hk, rho, t)))
+        count = Ms.shape[0]
+        self._reserve(self._size + count)
+        ids = np.arange(self._next_id, self._next_id + count, dtype=np.int64)
+        rows = self._data[self._size:self._size + count]
+        rows['id'] = ids
+        for name, column in zip(SAMPLE_FIELDS, (Ms, Hk, rho, t)):
+            rows[name] = column
+        self._rows.update(zip(ids.tolist(), range(self._size, self._size + count)))
+        self._size += count
+        self._next_id += count
+        return ids
+
+    def row_of(self, sample_id: int) -> int:
+        row = self._rows.get(sample_id)
+        if row is None:
+            raise KeyError(f"Unknown sample id: {sample_id}")
+        return row
+
+    def get(self, sample_id: int) -> Tuple[float, float, float, float]:
+        row = self._data[self.row_of(sample_id)]
+        return tuple(float(row[name]) for name in SAMPLE_FIELDS)
+
+    def update(self, sample_id: int, Ms: float, Hk: float, rho: float, t: float):
+        self._data[self.row_of(sample_id)] = (sample_id, Ms, Hk, rho, t)
+
+    def delete(self, sample_id: int) -> int:
+        # 删除样品, 最后一行移到被删的行; 返回被删样品原来的行号
+        row = self._rows.pop(sample_id, None)
+        if row is None:
+            raise KeyError(f"Unknown sample id: {sample_id}")
+        last = self._size - 1
+        if row != last:
+            self._data[row] = self._data[last]
+            self._rows[int(self._data[row]['id'])] = row
+        self._size = last
+        return row
+
+    def remove(self, sample_id: int) -> int:
+        # 删除样品, 后面的行依次前移一行, 其余样品的顺序不变; 返回被删样品原来的行号
+        row = self._rows.pop(sample_id, None)
+        if row is None:
+            raise KeyError(f"Unknown sample id: {sample_id}")
+        last = self._size - 1
+        self._data[row:last] = self._data[row + 1:self._size]
+        self._rows.update(zip(self._data['id'][row:last].tolist(), range(row, last)))
+        self._size = last
+        return row
+
+    def clear(self):
+        self._size = 0
+        self._rows = {}
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._data['id'][:self._size]
+
+    @property
+    def rows(self) -> np.ndarray:
+        # 当前所有样品的结构化数组视图
+        return self._data[:self._size]
+
+    def column(self, name: str) -> np.ndarray:
+        # 输入单位的一列(零复制的跨步视图)
+        if name not in SAMPLE_FIELDS:
+            raise KeyError(f"Unknown sample field: {name}")
+        return self._data[name][:self._size]
+
+    def columns(self, unit_type: UnitType = UnitType.SI) -> Tuple[np.ndarray, ...]:
+        # 换算到unit_type单位制的(Ms, Hk, rho, t), 可以直接传给calculate_batch或ShimadaPipeline
+        return sample_columns(*(self.column(name) for name in SAMPLE_FIELDS), unit_type=unit_type)
+
+
+if __name__ == '__main__':
+    import time
+    from physical_model.landau_lifshitz_gilbert import CGSSampleInfo
+
+    num_samples = 10 ** 5
+    rng = np.random.default_rng(0)
+    samples = np.stack([rng.uniform(5., 20., num_samples), rng.uniform(1., 100., num_samples),
+                        rng.uniform(0., 1000., num_samples), rng.uniform(100., 10000., num_samples)], axis=-1).tolist()
+    delete_order = rng.permutation(num_samples).tolist()
+
+    # 原来的list-of-lists: pop(row)为O(N), 每次绘图为每个样品创建一个CGSSampleInfo
+    start = time.perf_counter()
+    sample_info_list = []
+    for sample in samples:
+        sample_info_list.append(sample)
+    append_time = time.perf_counter() - start
+    start = time.perf_counter()
+    infos = [CGSSampleInfo(*sample, verbose=False).get_info() for sample in sample_info_list]
+    columns_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(1000):
+        sample_info_list.pop(rng.integers(len(sample_info_list)))
+    delete_time = (time.perf_counter() - start) / 1000
+    print(f"list\tappend={append_time:.3f}s\tcolumns={columns_time:.3f}s\tdelete={delete_time * 1e6:.1f}μs/row")
+
+    start = time.perf_counter()
+    table = SampleTable()
+    for sample in samples:
+        table.append(*sample)
+    append_time = time.perf_counter() - start
+    start = time.perf_counter()
+    Ms, Hk, rho, t = table.columns()
+    columns_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for sample_id in delete_order[:1000]:
+        table.delete(sample_id)
+    delete_time = (time.perf_counter() - start) / 1000
+    print(f"SampleTable\tappend={append_time:.3f}s\tcolumns={columns_time:.3f}s\tdelete={delete_time * 1e6:.1f}μs/row")
+    # 删除后剩下的样品与逐个保留的结果一致
+    remaining = set(range(num_samples)) - set(delete_order[:1000])
+    assert set(table.ids.tolist()) == remaining
+    assert all(table.get(i) == tuple(samples[i]) for i in list(remaining)[:1000])
+    assert np.shares_memory(table.column('Ms'), table.rows)
+
+    # remove: 保持顺序的删除
+    start = time.perf_counter()
+    for sample_id in delete_order[1000:2000]:
+        table.remove(sample_id)
+    remove_time = (time.perf_counter() - start) / 1000
+    print(f"SampleTable\tremove={remove_time * 1e6:.1f}μs/row (order-preserving)")
+    order = table.ids.tolist()
+    table.remove(order[len(order) // 2])
+    del order[len(order) // 2]
+    assert table.ids.tolist() == order
+    assert all(table.row_of(sample_id) == row for row, sample_id in enumerate(order))
@@ -0,0 +1,137 @@
+# Shimada模型+涡流修正的增量计算: 每个中间量是依赖图中的一个节点, 按样品(行)缓存
+# 输入变化时只重新计算受影响的节点和行, 例如只改alpha时不重算ω_r^2和趋肤因子k^2
+from typing import Callable, Dict, Tuple
+import numpy as np
+
+from physical_model.landau_lifshitz_gilbert import frequency_grid, FrequencySpacing
+from utils.my_constant import constants_for_llg, ResolvedConstants, UnitType
+
+# 每个样品一个值的输入(SI单位), 以(N,1)列向量保存
+SAMPLE_INPUTS = ('alpha', 'Ms', 'Hk', 'rho', 't')
+# 所有样品共享的输入, 变化时所有行都要重算
+SHARED_INPUTS = ('omega',)
+
+
+def _omega_r_square(Ms, Hk, constants: ResolvedConstants):
+    # ω_r^2 = γ^2*H_k*(H_k+M_S/μ_0)
+    return constants.gamma**2*Hk*(Hk+Ms/constants.miu_0)
+
+
+def _term_top(Ms, omega_r_square, Hk, constants: ResolvedConstants):
+    # χ_0*ω_r^2 = M_S/(μ_0*H_k)*ω_r^2
+    return Ms/(constants.miu_0*Hk)*omega_r_square
+
+
+def _lambda_prime(Ms, alpha, constants: ResolvedConstants):
+    # λ' = (M_S*α*γ)/μ_0
+    return Ms*alpha*constants.gamma/constants.miu_0
+
+
+def _miu(omega, omega_r_square, lambda_prime, term_top, constants: ResolvedConstants):
+    # μ = 1 + χ_0*ω_r^2/(ω_r^2-ω^2-iλ'ω)
+    shape = np.broadcast_shapes(np.shape(omega_r_square), np.shape(lambda_prime), np.shape(omega))
+    miu = np.empty(shape, dtype=np.complex128)
+    np.subtract(omega_r_square, np.square(omega), out=miu.real)
+    np.multiply(-lambda_prime, omega, out=miu.imag)
+    np.divide(term_top, miu, out=miu)
+    miu += 1.
+    return miu
+
+
+def _k_square(omega, rho, t, constants: ResolvedConstants):
+    # k^2 = t^2*ω/ρ, rho=0(无涡流)的行为0
+    t_square_over_rho = np.divide(t*t, rho, out=np.zeros(np.broadcast_shapes(rho.shape, t.shape)), where=rho != 0.)
+    return t_square_over_rho*omega
+
+
+def _miu_eff(miu, k_square, rho, constants: ResolvedConstants):
+    # x = t/2*√(-iμ_0'*μ*ω/ρ) = √(-iμ_0'*μ*k^2/4), μ_eff = μ*tanh(x)/x
+    eddy = rho[:, 0] != 0.
+    miu_eff = miu.copy()
+    if np.any(eddy):
+        miu_eddy = miu[eddy]
+        x = np.sqrt(-0.25j*constants.miu_0_eddy*miu_eddy*k_square[eddy])
+        miu_eff[eddy] = miu_eddy*np.tanh(x)/x
+    return miu_eff
+
+
+class ShimadaPipeline:
+    # 节点名 -> (依赖, 计算函数), 按拓扑顺序排列
+    nodes: Dict[str, Tuple[Tuple[str, ...], Callable]] = {
+        'omega_r_square': (('Ms', 'Hk'), _omega_r_square),
+        'term_top': (('Ms', 'omega_r_square', 'Hk'), _term_top),
+        'lambda_prime': (('Ms', 'alpha'), _lambda_prime),
+        'miu': (('omega', 'omega_r_square', 'lambda_prime', 'term_top'), _miu),
+        'k_square': (('omega', 'rho', 't'), _k_square),
+        'miu_eff': (('miu', 'k_square', 'rho'), _miu_eff),
+    }
+
+    def __init__(self, unit_type: UnitType = UnitType.SI):
+        self.constants = constants_for_llg.resolve(unit_type)
+        self.values: Dict[str, np.ndarray] = {}
+        self.freq = None
+        self.num_samples = 0
+        self.recomputed: Dict[str, int] = {}  # 上一次evaluate中各节点重算的行数
+
+    def update(self, f_info: Tuple[float, float], num_points: int, alpha, Ms, Hk, rho, t,
+               spacing: FrequencySpacing = FrequencySpacing.LOG) -> Tuple[np.ndarray, np.ndarray]:
+        # 传入当前的全部输入, 与上一次比较后只重算变化的部分, 返回(freq, miu_eff(N, num_points))
+        # 返回的miu_eff是缓存数组本身, 之后的update会原地更新其中变化的行
+        # 复制输入, 调用方之后原地修改数组时仍能检测到变化
+        Ms, Hk, rho, t = (np.array(x, dtype=np.float64).reshape(-1, 1) for x in (Ms, Hk, rho, t))
+        alpha = np.array(np.broadcast_to(np.asarray(alpha, dtype=np.float64).reshape(-1, 1), Ms.shape))
+        min_f, max_f = f_info
+        freq, omega = frequency_grid(float(min_f), float(max_f), int(num_points), spacing)
+        if Ms.shape[0] != self.num_samples:
+            # 样品数变化时全部重算
+            self.values = {}
+            self.num_samples = Ms.shape[0]
+        changed = {}
+        old_omega = self.values.get('omega')
+        changed['omega'] = np.full(self.num_samples, old_omega is None or not np.array_equal(old_omega, omega))
+        for name, value in zip(SAMPLE_INPUTS, (alpha, Ms, Hk, rho, t)):
+            old_value = self.values.get(name)
+            changed[name] = np.ones(self.num_samples, dtype=bool) if old_value is None else old_value[:, 0] != value[:, 0]
+            self.values[name] = value
+        self.values['omega'] = omega
+        self.freq = freq
+        return freq, self._evaluate(changed)
+
+    def _evaluate(self, changed: Dict[str, np.ndarray]) -> np.ndarray:
+        self.recomputed = {}
+        for name, (dependencies, func) in self.nodes.items():
+            rows = np.logical_or.reduce([changed[dependency] for dependency in dependencies])
+            if name not in self.values:
+                rows[:] = True
+            changed[name] = rows
+            count = int(np.count_nonzero(rows))
+            self.recomputed[name] = count
+            if count == self.num_samples:
+                self.values[name] = func(*(self.values[dependency] for dependency in dependencies), self.constants)
+            elif count:
+                # 只重算变化的行, 共享输入不按行索引
+                index = np.flatnonzero(rows)
+                self.values[name][index] = func(*(self.values[dependency] if dependency in SHARED_INPUTS
+                                                  else self.values[dependency][index]
+                                                  for dependency in dependencies), self.constants)
+        return self.values['miu_eff']
+
+
+if __name__ == '__main__':
+    import time
+
+    num_samples, num_points = 20, 10 ** 5
+    rng = np.random.default_rng(0)
+    Ms = rng.uniform(0.5, 2.0, num_samples)
+    Hk = rng.uniform(10., 1000., num_samples)
+    rho = rng.uniform(1e-7, 1e-5, num_samples)
+    t = rng.uniform(1e-7, 1e-5, num_samples)
+    pipeline = ShimadaPipeline()
+    for alpha in (0.001, 0.002):
+        start = time.perf_counter()
+        freq, miu = pipeline.update(f_info=(1., 1e10), num_points=num_points, alpha=alpha, Ms=Ms, Hk=Hk, rho=rho, t=t)
+        print(f"alpha={alpha}\ttime={time.perf_counter() - start:.3f}s\trecomputed rows={pipeline.recomputed}")
+    Hk[3] *= 2.
+    start = time.perf_counter()
+    freq, miu = pipeline.update(f_info=(1., 1e10), num_points=num_points, alpha=0.002, Ms=Ms, Hk=Hk, rho=rho, t=t)
+    print(f"Hk[3]\ttime={time.perf_counter() - start:.3f}s\trecomputed rows={pipeline.recomputed}")
@@ -0,0 +1,60 @@
+# Stoner-Wohlfarth 模型的平衡磁化角, 供 LandauLifshitzGilbertCalculator 的 WANG 模型使用
+# E(ϕ)/(μ_0*M_S) = H_k/2*sin^2(ϕ) - He*cos(ϕ-δ)
+import numpy as np
+
+
+def _torque(phi, He, delta, Hk):
+    # dE/dϕ = H_k/2*sin(2ϕ) + He*sin(ϕ-δ)
+    return 0.5*Hk*np.sin(2.*phi) + He*np.sin(phi-delta)
+
+
+def _stiffness(phi, He, delta, Hk):
+    # d^2E/dϕ^2 = H_k*cos(2ϕ) + He*cos(ϕ-δ)
+    return Hk*np.cos(2.*phi) + He*np.cos(phi-delta)
+
+
+def equilibrium_phi_0(He, delta, Hk, tol: float = 1e-12, max_iter: int = 100) -> np.ndarray:
+    # 对任意形状(可广播)的 He, δ, H_k 数组同时求平衡角ϕ_0, 返回值在[0, 2π)内
+    # 取离He最近的易轴方向与He方向之间的能量极小值, 即沿He方向饱和后减小磁场得到的分支
+    He, delta, Hk = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (He, delta, Hk)))
+    # He<0 等价于方向反转的正磁场
+    delta = np.where(He < 0., delta + np.pi, delta)
+    He = np.abs(He)
+    # 离He最近的易轴方向 ϕ_e = 0 或 π
+    phi_e = np.where(np.cos(delta) >= 0., 0., np.pi)
+    # He相对ϕ_e的夹角, 因为ϕ_e是最近的易轴方向, 所以在[-π/2, π/2]内
+    d = np.arctan2(np.sin(delta - phi_e), np.cos(delta - phi_e))
+    # dE/dϕ 在 lo 处<=0, 在 hi 处>=0, 括号内只有一个极小值
+    shape = He.shape
+    He, delta, Hk = He.ravel(), delta.ravel(), Hk.ravel()
+    lo = (phi_e + np.minimum(d, 0.)).ravel()
+    hi = (phi_e + np.maximum(d, 0.)).ravel()
+    phi = 0.5*(lo + hi)
+    # 只迭代尚未收敛的点
+    active = np.arange(phi.size)
+    for _ in range(max_iter):
+        p, p_lo, p_hi = phi[active], lo[active], hi[active]
+        p_He, p_delta, p_Hk = He[active], delta[active], Hk[active]
+        g = _torque(p, p_He, p_delta, p_Hk)
+        dg = _stiffness(p, p_He, p_delta, p_Hk)
+        # 收缩括号
+        negative = g < 0.
+        p_lo = np.where(negative, p, p_lo)
+        p_hi = np.where(negative, p_hi, p)
+        # Newton步, 超出括号或刚度为0时改用二分
+        step = np.divide(g, dg, out=np.full_like(g, np.inf), where=dg != 0.)
+        p_newton = p - step
+        bisect = ~np.isfinite(p_newton) | (p_newton < p_lo) | (p_newton > p_hi)
+        p_new = np.where(bisect, 0.5*(p_lo + p_hi), p_newton)
+        converged = (np.abs(p_new - p) <= tol) | (p_hi - p_lo <= tol)
+        phi[active], lo[active], hi[active] = p_new, p_lo, p_hi
+        active = active[~converged]
+        if active.size == 0:
+            break
+    return np.mod(phi, 2.*np.pi).reshape(shape)
+
+if __name__ == '__main__':
+    Hk = 80.  # A/m
+    He = np.linspace(0., 400., 5)[:, None]
+    delta = np.linspace(0., np.pi, 7)[None, :]
+    print(np.degrees(equilibrium_phi_0(He, delta, Hk)))
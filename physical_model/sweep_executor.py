@@ -0,0 +1,77 @@
+# 多进程执行 ParameterSweep, 各进程直接写入共享内存中的结果数组, 不回传大数组
+# 共享内存由RawArray分配, 返回的结果数组就是这块内存本身(不复制), 最后一个引用释放时内存随之释放
+import ctypes
+import time
+from multiprocessing import Pool, cpu_count
+from multiprocessing.sharedctypes import RawArray
+from typing import Callable, Tuple
+import numpy as np
+
+from physical_model.landau_lifshitz_gilbert import frequency_grid, FrequencySpacing
+from physical_model.parameter_sweep import ParameterSweep, SweepResult
+
+# 工作进程中的全局状态, 由 _init_worker 在每个进程中设置一次
+_worker_sweep = None
+_worker_out = None
+
+
+def _init_worker(sweep: ParameterSweep, shared):
+    global _worker_sweep, _worker_out
+    _worker_sweep = sweep
+    _worker_out = np.frombuffer(shared, dtype=np.complex128).reshape(sweep.size, sweep.num_points)
+
+
+def _run_chunk(chunk: Tuple[int, int]) -> int:
+    start, stop = chunk
+    _, _worker_out[start:stop] = _worker_sweep.evaluate_chunk(start, stop)
+    return stop - start
+
+
+def print_progress(done: int, total: int, elapsed: float):
+    print(f"Sweep: {done}/{total} points ({100. * done / total:.1f}%), {elapsed:.1f}s")
+
+
+class SweepExecutor:
+    def __init__(self, sweep: ParameterSweep, processes: int = None,
+                 progress_callback: Callable[[int, int, float], None] = print_progress):
+        self.sweep = sweep
+        self.processes = processes or cpu_count()
+        self.progress_callback = progress_callback
+
+    def tasks(self):
+        # 任务块不超过sweep.chunk_size(内存上限), 同时保证每个进程至少分到几块以平衡负载
+        chunk_size = max(1, min(self.sweep.chunk_size, -(-self.sweep.size // (4 * self.processes))))
+        return [(start, min(start + chunk_size, self.sweep.size)) for start in range(0, self.sweep.size, chunk_size)]
+
+    def run(self) -> SweepResult:
+        sweep = self.sweep
+        nbytes = sweep.size * sweep.num_points * np.dtype(np.complex128).itemsize
+        shared = RawArray(ctypes.c_char, nbytes)
+        start_time = time.perf_counter()
+        done = 0
+        with Pool(processes=self.processes, initializer=_init_worker, initargs=(sweep, shared)) as pool:
+            for count in pool.imap_unordered(_run_chunk, self.tasks()):
+                done += count
+                if self.progress_callback is not None:
+                    self.progress_callback(done, sweep.size, time.perf_counter() - start_time)
+        # miu直接引用共享内存(base为RawArray), 峰值内存只有一份结果
+        miu = np.frombuffer(shared, dtype=np.complex128).reshape(sweep.shape + (sweep.num_points,))
+        freq, _ = frequency_grid(float(sweep.f_info[0]), float(sweep.f_info[1]), int(sweep.num_points),
+                                 FrequencySpacing.LOG)
+        return SweepResult(sweep.axes, freq, miu)
+
+
+if __name__ == '__main__':
+    from physical_model.parameter_sweep import SweepAxis
+
+    sweep = ParameterSweep(axes=[SweepAxis('alpha', 1e-3, 1e-1, 20, is_log=True),
+                                 SweepAxis('Hk', 10., 1000., 50, is_log=True),
+                                 SweepAxis('rho', 1e-7, 1e-5, 20, is_log=True),
+                                 SweepAxis('t', 1e-7, 1e-5, 20, is_log=True)],
+                           fixed={'Ms': 1.5},
+                           f_info=(1., 1e10),
+                           num_points=200)
+    for processes in sorted({1, max(1, cpu_count() // 2), cpu_count()}):
+        start = time.perf_counter()
+        result = SweepExecutor(sweep, processes=processes, progress_callback=None).run()
+        print(f"processes={processes}\ttime={time.perf_counter() - start:.2f}s\tshape={result.miu.shape}")
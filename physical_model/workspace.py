@@ -0,0 +1,18 @@
+# 计算内核的预分配工作区, 重复计算同样长度的频谱时不再分配大数组
+import numpy as np
+
+
+class PermeabilityWorkspace:
+    def __init__(self, num_points: int):
+        self.num_points = num_points
+        self.scratch = np.empty(num_points, dtype=np.float64)  # ω^2等实数中间量
+        self.miu = np.empty(num_points, dtype=np.complex128)  # 不含涡流项的μ
+        self.x = np.empty(num_points, dtype=np.complex128)  # 涡流项的 x = t/2*√(-iμ_0*μ*ω/ρ)
+
+    def check(self, num_points: int):
+        if num_points != self.num_points:
+            raise ValueError(f"Workspace is sized for {self.num_points} points, got {num_points}")
+
+    @property
+    def nbytes(self) -> int:
+        return self.scratch.nbytes + self.miu.nbytes + self.x.nbytes
@@ -9,7 +9,7 @@ from PyQt5.QtCore import QStringListModel, QEvent, pyqtSlot, QObject, Qt, QModel
     QItemSelection, QTimer
 from PyQt5.QtGui import QDoubleValidator, QStandardItem, QIntValidator, QPalette, QColor, QStandardItemModel
 from PyQt5.QtWidgets import QStyledItemDelegate, QApplication, QLineEdit, QDialog, qApp, QMessageBox, QListWidgetItem, \
-    QCheckBox, QAbstractItemView, QVBoxLayout, QWidget, QListView
+    QCheckBox, QAbstractItemView, QVBoxLayout, QWidget, QListView, QFileDialog
 from matplotlib.figure import Figure
 
 from ui.main_window import Ui_MainWindow
@@ -24,7 +24,16 @@ from ui.parameter_adjust_widget import ParameterAdjustWidget
 from ui.test_widget import TestWidget
 from ui.plot_widget import PlotWidget
 from ui.parameter_info import ParameterInfoDict
-from physical_model.landau_lifshitz_gilbert import LandauLifshitzGilbertCalculator,CGSSampleInfo,CalculatorType,UnitType
+from physical_model.landau_lifshitz_gilbert import LandauLifshitzGilbertCalculator,CGSSampleInfo,CalculatorType,UnitType, \
+    sample_columns
+from physical_model.shimada_pipeline import ShimadaPipeline
+from physical_model.sample_table import SampleTable, SAMPLE_FIELDS
+from physical_model.sample_io import write_library
+from ui.sample_table_model import SampleTableModel
+
+SAMPLE_LIBRARY_FILTER = "Sample library (*.csv *.npz *.npy)"
+# 定时绘图最多画的样品数, 导入的样品库可能很大, 只画其中一部分
+PLOT_MAX_SAMPLES = 10
 
 
 def on_Action_quit():
@@ -64,14 +73,17 @@ class Simulator(Ui_MainWindow):
         self.scientific_validator = QDoubleValidator()
         self.scientific_validator.setNotation(QDoubleValidator.ScientificNotation)
 
-        self.sample_info_list = []
-        self.list_view_sampleinfo_model = QStandardItemModel()
+        # 样品按列存储, listView中的行与表中的行一一对应
+        self.sample_table = SampleTable()
+        self.list_view_sampleinfo_model = SampleTableModel(self.sample_table)
 
         self.timer = QTimer()
         self.timer.timeout.connect(self.plot_curves)
         self.timer.start(5000)  # 启动定时器，每5秒触发一次
 
         self.new_plot_widget = PlotWidget()
+        # 按样品缓存中间量, 定时重绘时只重算变化的参数影响到的部分
+        self.shimada_pipeline = ShimadaPipeline()
 
     def setupUi(self, MainWindow):
         Ui_MainWindow.setupUi(self, MainWindow)
@@ -117,6 +129,17 @@ class Simulator(Ui_MainWindow):
         self.horizontalLayout_2.replaceWidget(self.widget_plot, self.new_plot_widget)
         self.widget_plot.deleteLater()
 
+        # 样品库的批量导入/导出(.csv, .npz, .npy)
+        self.actionImportSamples = QtWidgets.QAction("Import Samples...", MainWindow)
+        self.actionImportSamples.setObjectName("actionImportSamples")
+        self.actionExportSamples = QtWidgets.QAction("Export Samples...", MainWindow)
+        self.actionExportSamples.setObjectName("actionExportSamples")
+        self.menuFile.insertAction(self.actionSaveResultsAs, self.actionImportSamples)
+        self.menuFile.insertAction(self.actionSaveResultsAs, self.actionExportSamples)
+        self.menuFile.insertSeparator(self.actionSaveResultsAs)
+        self.actionImportSamples.triggered.connect(self.on_actionImportSamples_triggered)
+        self.actionExportSamples.triggered.connect(self.on_actionExportSamples_triggered)
+
 
 
     def init_fieldinfo_all(self):
@@ -242,57 +265,63 @@ class Simulator(Ui_MainWindow):
             self.freq_to = float(self.lineEdit_sampleinfo_freq_to.text())
 
     def on_pushButton_sampleinfo_add_clicked(self):
-        new_sampleinfo = [self.ms,self.hk,self.rho,self.t]
-        self.sample_info_list.append(new_sampleinfo)
-        self.list_view_sampleinfo_model.appendRow(QStandardItem(f"Ms={self.ms:.2f}kG, Hk={self.hk:3f}Oe\nRho={self.rho:3f}μΩ*cm, t={self.t:.3f}mm"))
+        self.list_view_sampleinfo_model.append(self.ms,self.hk,self.rho,self.t)
     def on_pushButton_sampleinfo_update_clicked(self):
         if self.listView_sampleinfo.selectedIndexes():
-            new_sampleinfo = [self.ms,self.hk,self.rho,self.t]
-            new_data = QStandardItem(f"Ms={self.ms:.2f}kG, Hk={self.hk:3f}Oe\nRho={self.rho:3f}μΩ*cm, t={self.t:.3f}mm")
             index = self.listView_sampleinfo.selectedIndexes()[0]
-            self.sample_info_list[index.row()]=new_sampleinfo
-            self.list_view_sampleinfo_model.setItem(index.row(),index.column(),new_data)
-            # print(self.sample_info_list)
+            self.list_view_sampleinfo_model.update(index.row(),self.ms,self.hk,self.rho,self.t)
+            # print(self.sample_table.rows)
     def on_pushButton_sampleinfo_delete_clicked(self):
         if self.listView_sampleinfo.selectedIndexes():
             index = self.listView_sampleinfo.selectedIndexes()[0]
-            self.sample_info_list.pop(index.row())
-            self.list_view_sampleinfo_model.removeRow(index.row())
-            print(self.sample_info_list)
+            self.list_view_sampleinfo_model.delete(index.row())
+            print(self.sample_table.rows)
             # print(self.listView_sampleinfo.selectedIndexes())
+    def on_actionImportSamples_triggered(self):
+        path, _ = QFileDialog.getOpenFileName(None, "Import Samples", "", SAMPLE_LIBRARY_FILTER)
+        if path:
+            try:
+                self.list_view_sampleinfo_model.load(path)
+            except (OSError, ValueError) as error:
+                QMessageBox.warning(None, "Import Samples", str(error))
+    def on_actionExportSamples_triggered(self):
+        path, _ = QFileDialog.getSaveFileName(None, "Export Samples", "", SAMPLE_LIBRARY_FILTER)
+        if path:
+            try:
+                write_library(self.sample_table, path)
+            except (OSError, ValueError) as error:
+                QMessageBox.warning(None, "Export Samples", str(error))
     def on_spinBox_sampleinfo_freq_nums_valueChanged(self,new_value):
         self.num_points = new_value
 
     def plot_curves(self):
-        if self.sample_info_list:
+        if len(self.sample_table):
             print("Plot")
-            calculator = LandauLifshitzGilbertCalculator(calculator_type=CalculatorType.SHIMADA,
-                                                 unit_type=UnitType.SI,
-                                                 alpha=self.alpha,
-                                                 He=self.he,
-                                                 phi_0=self.phi_0,
-                                                 delta=self.delta,
-                                                 beta=self.beta)
-            ohnuma_sample_info_list = []
-            for sample_info in self.sample_info_list:
-                ohnuma_sample_info_list.append(CGSSampleInfo(sample_info[0], sample_info[1], sample_info[2], sample_info[3]))
-            x_list = []
-
-            y1_list = []
-            y2_list = []
-            for ohnuma_sample_info in ohnuma_sample_info_list:
-                freq, (miu_real, miu_imag) = calculator.calculate(f_info=(self.freq_from,self.freq_to), num_points=self.num_points,
-                                                                  sample_info=ohnuma_sample_info)
-                x_list.append(freq)
-                print(f"f from {freq[0]}Hz to {freq[-1]}Hz")
-                y1_list.append(miu_real)
-                y2_list.append(miu_imag)
-            self.new_plot_widget.update_plot(x_list,y1_list,y2_list)
+            # 只画前PLOT_MAX_SAMPLES个样品和选中的样品, 按列一起换算到SI
+            selected = self.listView_sampleinfo.selectedIndexes()
+            rows = plot_rows(len(self.sample_table), selected[0].row() if selected else None)
+            Ms, Hk, rho, t = sample_columns(*(self.sample_table.column(name)[rows] for name in SAMPLE_FIELDS))
+            # miu为(样品数, num_points)的复数矩阵
+            freq, miu = self.shimada_pipeline.update(f_info=(self.freq_from,self.freq_to), num_points=self.num_points,
+                                                     alpha=self.alpha, Ms=Ms, Hk=Hk, rho=rho, t=t)
+            print(f"f from {freq[0]}Hz to {freq[-1]}Hz")
+            print(f"Recomputed rows: {self.shimada_pipeline.recomputed}")
+            x_list = [freq] * len(rows)
+            y1_list = list(miu.real)
+            y2_list = list(miu.imag)
+            self.new_plot_widget.update_plot(x_list,y1_list,y2_list,rows)
             # for index,x_data in enumerate(x_list):
             #     self.plot_canvas.
 
         else:
-            print("sample_info_list is None")
+            print("sample_table is empty")
+def plot_rows(num_samples: int, selected_row: int = None, max_samples: int = PLOT_MAX_SAMPLES) -> np.ndarray:
+    # 要画的行号: 前max_samples行, 选中的行不在其中时替换最后一行
+    rows = np.arange(min(num_samples, max_samples))
+    if selected_row is not None and selected_row >= max_samples:
+        rows[-1] = selected_row
+    return rows
+
 def get_scale(from_value,to_value,value):
     return int((value - from_value) / (to_value - from_value) * 100.)
 
@@ -27,17 +27,21 @@ class PlotWidget(QWidget):
 
         self.colors = list(plt.rcParams['axes.prop_cycle'].by_key()['color'])
 
-    def update_plot(self, x_data_list,y1_data_list,y2_data_list):
-        # 更新数据
+    def update_plot(self, x_data_list,y1_data_list,y2_data_list,rows=None):
+        # 更新数据, rows为各曲线在样品表中的行号, 用于图例编号和颜色(样品多于颜色数时循环使用)
+        if rows is None:
+            rows = range(len(x_data_list))
 
         # 清空绘图区域
         self.ax1.clear()
         self.ax2.clear()
         for index,x_data in enumerate(x_data_list):
-            # self.ax1.semilogx(x_data, y1_data_list[index], label=f'μ\'-#{index}', color=self.colors[index])
-            # self.ax2.semilogx(x_data, y2_data_list[index], label=f'μ"-#{index}', color=self.colors[index],linestyle='--')
-            self.ax1.loglog(x_data, y1_data_list[index], label=f'μ\'-#{index}', color=self.colors[index])
-            self.ax2.loglog(x_data, y2_data_list[index], label=f'μ"-#{index}', color=self.colors[index],
+            row = rows[index]
+            color = self.colors[row % len(self.colors)]
+            # self.ax1.semilogx(x_data, y1_data_list[index], label=f'μ\'-#{row}', color=color)
+            # self.ax2.semilogx(x_data, y2_data_list[index], label=f'μ"-#{row}', color=color,linestyle='--')
+            self.ax1.loglog(x_data, y1_data_list[index], label=f'μ\'-#{row}', color=color)
+            self.ax2.loglog(x_data, y2_data_list[index], label=f'μ"-#{row}', color=color,
                               linestyle='--')
 
         self.ax1.set_title('Permeability LLG Simulation on Frequency')
@@ -0,0 +1,45 @@
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+
+from physical_model.sample_io import read_library
+from physical_model.sample_table import SampleTable
+
+
+class SampleTableModel(QAbstractListModel):
+    # listView直接显示SampleTable的行, 文字只在绘制可见行时生成, 不为每个样品创建QStandardItem
+    def __init__(self, table: SampleTable):
+        super(SampleTableModel, self).__init__()
+        self.table = table
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.table)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        row = self.table.rows[index.row()]
+        return f"Ms={row['Ms']:.2f}kG, Hk={row['Hk']:3f}Oe\nRho={row['rho']:3f}μΩ*cm, t={row['t']:.3f}mm"
+
+    def append(self, Ms: float, Hk: float, rho: float, t: float) -> int:
+        row = len(self.table)
+        self.beginInsertRows(QModelIndex(), row, row)
+        sample_id = self.table.append(Ms, Hk, rho, t)
+        self.endInsertRows()
+        return sample_id
+
+    def update(self, row: int, Ms: float, Hk: float, rho: float, t: float):
+        self.table.update(int(self.table.ids[row]), Ms, Hk, rho, t)
+        self.dataChanged.emit(self.index(row), self.index(row))
+
+    def delete(self, row: int):
+        # 保持其余样品的顺序, 图例编号和曲线颜色不会因为删除而互换
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.table.remove(int(self.table.ids[row]))
+        self.endRemoveRows()
+
+    def load(self, path: str):
+        # 导入样品库并追加到表中, 行数可能很大, 整体重置view; 读取失败时表不变(read_library解析完才追加)
+        self.beginResetModel()
+        try:
+            read_library(path, self.table)
+        finally:
+            self.endResetModel()
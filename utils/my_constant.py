@@ -1,4 +1,7 @@
+from collections import namedtuple
 from enum import Enum
+from functools import lru_cache
+from typing import Tuple
 
 from scipy import constants
 
@@ -46,6 +49,11 @@ class Constant:
         return f'{self.name},{self.symbol}={self.si_value}[{self.si_unit}]={self.cgs_value}[{self.cgs_unit}]'
 
 
+@lru_cache(maxsize=None)
+def _resolved_type(names: Tuple[str, ...]):
+    return namedtuple('ResolvedConstants', names)
+
+
 class ConstantSet:
     unit_type = UnitType.SI
 
@@ -60,6 +68,17 @@ class ConstantSet:
         for constant in self._parameters.values():
             print(constant)
 
+    def resolve(self, unit_type: UnitType):
+        # 指定单位制下全部常数值的不可变快照(namedtuple), 不读写全局的unit_type
+        # 计算中直接读快照的属性, 没有__getattr__的字典查找和单位制判断
+        if unit_type == UnitType.SI:
+            values = [constant.si() for constant in self._parameters.values()]
+        elif unit_type == UnitType.CGS:
+            values = [constant.cgs() for constant in self._parameters.values()]
+        else:
+            raise ValueError("Unsupported unit type")
+        return _resolved_type(tuple(self._parameters.keys()))(*values)
+
     def __getattr__(self, name):
         if name in self._parameters:
             if ConstantSet.unit_type == UnitType.SI:
@@ -80,6 +99,9 @@ g_e = Constant("Electron's g-factor", "g_e", -2.00231930436118, "1")
 h = Constant("Planck constant", "h", constants.h, "J*s", 1e7, "erg*s")
 hbar = Constant("Reduced Planck constant", "ħ", constants.hbar, "J*s", 1e7, "erg*s")
 miu_0 = Constant("Vacuum permeability", "μ_0", constants.mu_0, "H/m", 10000000 / (4 * constants.pi), "1")
+# 涡流扩散方程 ∇^2H = μ_0'*μ*σ*∂H/∂t 中的系数, SI中为μ_0, 电磁单位制(emu, ρ[abΩ*cm])中为4π
+miu_0_eddy = Constant("Magnetic constant for eddy-current diffusion", "μ_0'", constants.mu_0, "H/m",
+                      4 * constants.pi / constants.mu_0, "1")
 miu_b = Constant("Bohr magneton", "μ_B", e.si() * hbar.si() / (2 * m_e.si()), "J/T",
                  e.factor() * hbar.factor() / m_e.factor() * 1 / c.si(), "erg/G")
 gamma_e = Constant("Electron's gyromagnetic ratio", "γ_e", g_e.si() * miu_b.si() / hbar.si(), "Hz/T",
@@ -97,7 +119,24 @@ constants_for_llg._parameters = {'pi': pi,
                                  'hbar': hbar,
                                  'miu_b': miu_b,
                                  'gamma': gamma,
-                                 'miu_0': miu_0}
+                                 'miu_0': miu_0,
+                                 'miu_0_eddy': miu_0_eddy}
+# constants_for_llg.resolve(unit_type) 返回的类型
+ResolvedConstants = _resolved_type(tuple(constants_for_llg._parameters.keys()))
+
+# 样品参数的输入单位(kG, Oe, μΩ*cm, nm)到计算单位制的换算系数
+# si_value为1个输入单位对应的SI值, convert_factor为SI->emu, cgs_value为1个输入单位对应的emu值
+sample_Ms = Constant("Saturation magnetization per kG", "M_S", 0.1, "T", 10000., "G")  # 4πM_S
+sample_Hk = Constant("Anisotropy field per Oe", "H_k", 1000. / (4 * constants.pi), "A/m",
+                     4 * constants.pi / 1000., "Oe")
+sample_rho = Constant("Resistivity per μΩ*cm", "ρ", 1e-8, "Ω*m", 1e11, "abΩ*cm")
+sample_t = Constant("Thickness per nm", "t", 1e-9, "m", 100., "cm")
+
+sample_units = ConstantSet()
+sample_units._parameters = {'Ms': sample_Ms,
+                            'Hk': sample_Hk,
+                            'rho': sample_rho,
+                            't': sample_t}
 
 # gamma_e = Constant("Electron's gyromagnetic ratio", "γ", constants., "J*s",1e7, "erg*s")
 if __name__ == "__main__":